@@ -187,12 +187,9 @@ class BackupManager:
                     db_content = json.load(f)
                 
                 # Restore the database
-                from infoblox_mock.db import db, db_lock
+                from infoblox_mock.db import import_db
                 
-                with db_lock:
-                    # Replace the entire database
-                    for key, value in db_content.items():
-                        db[key] = value
+                import_db(db_content)
                 
                 # Clean up temporary directory
                 shutil.rmtree(temp_dir, ignore_errors=True)
@@ -207,8 +204,8 @@ class BackupManager:
                 logger.info(f"Restore completed: {backup['name']} ({backup_id})")
                 
                 # Send webhook notification
-                from infoblox_mock.webhooks import webhook_manager
-                webhook_manager.notify_webhook('grid:restore', {
+                from infoblox_mock.webhooks import webhook_manager, EVENT_GRID_RESTORE
+                webhook_manager.notify_webhook(EVENT_GRID_RESTORE, {
                     'restore_id': restore_id,
                     'backup_id': backup_id,
                     'backup_name': backup['name'],
@@ -222,8 +219,8 @@ class BackupManager:
                 restore_data['error'] = str(e)
                 
                 # Send webhook notification for failure
-                from infoblox_mock.webhooks import webhook_manager
-                webhook_manager.notify_webhook('grid:restore', {
+                from infoblox_mock.webhooks import webhook_manager, EVENT_GRID_RESTORE
+                webhook_manager.notify_webhook(EVENT_GRID_RESTORE, {
                     'restore_id': restore_id,
                     'backup_id': backup_id,
                     'backup_name': backup['name'],
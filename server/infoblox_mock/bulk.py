@@ -4,55 +4,140 @@ Bulk operations functionality for Infoblox Mock Server
 
 import logging
 from infoblox_mock.validators import validate_and_prepare_data
-from infoblox_mock.db import add_object, update_object, delete_object
+from infoblox_mock.db import (add_objects, update_object, delete_object,
+                              natural_key, find_duplicate_object)
+from infoblox_mock.utils import generate_refs
 
 logger = logging.getLogger(__name__)
 
-def process_bulk_operation(objects, operation="create"):
-    """Process a bulk operation (create, update, delete)"""
-    results = []
+def _duplicate_error(obj_type, data):
+    """Error message for an object whose natural key is already taken"""
+    if obj_type == "network" or obj_type == "network_container":
+        return f"Network already exists: {data.get('network')}"
+    return f"DNS record already exists: {data.get('name')}"
+
+def _bulk_create(objects):
+    """Validate every object first, then insert all valid ones in one database write"""
+    results = [None] * len(objects)
+    pending = []  # (index, obj_type, validated data)
+    seen = set()  # (obj_type, natural key) of objects accepted earlier in this batch
     
     for i, obj_data in enumerate(objects):
+        # Reject malformed entries up front rather than via exceptions
+        if not isinstance(obj_data, dict):
+            results[i] = {
+                "index": i,
+                "status": "ERROR",
+                "error": "Invalid object, expected a JSON object"
+            }
+            continue
+        
         # Object must have a type
         if "_object" not in obj_data:
-            results.append({
+            results[i] = {
                 "index": i,
                 "status": "ERROR",
                 "error": "Missing _object field"
-            })
+            }
             continue
         
         obj_type = obj_data["_object"]
+        if not isinstance(obj_type, str):
+            results[i] = {
+                "index": i,
+                "status": "ERROR",
+                "error": "Invalid _object field, expected a string"
+            }
+            continue
+        
         data = {k: v for k, v in obj_data.items() if not k.startswith('_')}
         
         try:
-            if operation == "create":
-                # Validate and prepare data
-                validated_data, error = validate_and_prepare_data(obj_type, data)
-                if error:
-                    results.append({
+            # Validate and prepare data
+            validated_data, error = validate_and_prepare_data(obj_type, data)
+            if error:
+                results[i] = {
+                    "index": i,
+                    "status": "ERROR",
+                    "error": error
+                }
+                continue
+            
+            # Reject duplicates of stored objects and of earlier objects in the batch
+            key = natural_key(obj_type, validated_data)
+            if key is not None:
+                if (obj_type, key) in seen or find_duplicate_object(obj_type, validated_data) is not None:
+                    results[i] = {
                         "index": i,
                         "status": "ERROR",
-                        "error": error
-                    })
+                        "error": _duplicate_error(obj_type, validated_data)
+                    }
                     continue
-                
-                # Create the object
-                ref = add_object(obj_type, validated_data)
-                if ref:
-                    results.append({
-                        "index": i,
-                        "status": "SUCCESS",
-                        "ref": ref
-                    })
-                else:
-                    results.append({
-                        "index": i,
-                        "status": "ERROR",
-                        "error": "Failed to create object"
-                    })
+                seen.add((obj_type, key))
             
-            elif operation == "update":
+            pending.append((i, obj_type, validated_data))
+        
+        except Exception as e:
+            logger.error(f"Error in bulk operation: {str(e)}")
+            results[i] = {
+                "index": i,
+                "status": "ERROR",
+                "error": str(e)
+            }
+    
+    # Create the object references in one batch
+    new_refs = generate_refs([(obj_type, data) for _, obj_type, data in pending])
+    for (_, _, data), ref in zip(pending, new_refs):
+        data["_ref"] = ref
+    
+    # Create the objects
+    refs = add_objects([(obj_type, data) for _, obj_type, data in pending])
+    for (i, _, _), ref in zip(pending, refs):
+        if ref:
+            results[i] = {
+                "index": i,
+                "status": "SUCCESS",
+                "ref": ref
+            }
+        else:
+            results[i] = {
+                "index": i,
+                "status": "ERROR",
+                "error": "Failed to create object"
+            }
+    
+    return results
+
+def process_bulk_operation(objects, operation="create"):
+    """Process a bulk operation (create, update, delete)"""
+    if operation == "create":
+        return _bulk_create(objects)
+    
+    results = []
+    
+    for i, obj_data in enumerate(objects):
+        # Reject malformed entries up front rather than via exceptions
+        if not isinstance(obj_data, dict):
+            results.append({
+                "index": i,
+                "status": "ERROR",
+                "error": "Invalid object, expected a JSON object"
+            })
+            continue
+        
+        # Object must have a type
+        if "_object" not in obj_data:
+            results.append({
+                "index": i,
+                "status": "ERROR",
+                "error": "Missing _object field"
+            })
+            continue
+        
+        data = {k: v for k, v in obj_data.items() if not k.startswith('_')}
+        
+        try:
+            if operation == "update":
                 # Object must have a reference
                 if "_ref" not in obj_data:
                     results.append({
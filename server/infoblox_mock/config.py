@@ -4,8 +4,15 @@ Configuration management for Infoblox Mock Server
 
 import json
 import os
+import time
 import logging
 
+# orjson is optional; fall back to the stdlib json module when it is missing
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 # Default configuration
@@ -25,9 +32,19 @@ CONFIG = {
     'lock_probability': 0.01,     # 1% chance of a lock per operation
     'wapi_version': 'v2.11',      # WAPI version to simulate
     'mock_responses_dir': None,   # Directory for mock responses (if None, feature is disabled)
-    'record_mode': False          # Enable recording of API interactions
+    'record_mode': False,         # Enable recording of API interactions
+    'webhook_workers': 8          # Threads delivering webhook notifications
 }
 
+# Set when CONFIG changes in memory and has not been written to disk yet
+_CONFIG_DIRTY = False
+
+# time.monotonic() of the last save_config write
+_last_config_flush = 0.0
+
+# Directories already created/checked by save_config in this process
+_ENSURED_DIRS = set()
+
 # Add to config.py
 # Supported WAPI versions
 SUPPORTED_WAPI_VERSIONS = ['v1.4', 'v2.0', 'v2.1', 'v2.5', 'v2.7', 'v2.11', 'v2.12']
@@ -54,13 +71,16 @@ def is_feature_supported(feature):
 def load_config(config_file):
     """Load configuration from a JSON file"""
     try:
-        with open(config_file, 'r') as f:
-            config_data = json.load(f)
+        if orjson:
+            with open(config_file, 'rb') as f:
+                config_data = orjson.loads(f.read())
+        else:
+            with open(config_file, 'r') as f:
+                config_data = json.load(f)
             
-        # Update configuration with loaded values
-        for key, value in config_data.items():
-            if key in CONFIG:
-                CONFIG[key] = value
+        # Update configuration with loaded values (known keys only)
+        for key in CONFIG.keys() & config_data.keys():
+            CONFIG[key] = config_data[key]
                 
         logger.info(f"Loaded configuration from {config_file}")
         return True
@@ -70,15 +90,25 @@ def load_config(config_file):
 
 def save_config(config_file=None):
     """Save current configuration to a JSON file"""
+    global _CONFIG_DIRTY, _last_config_flush
     file_path = config_file or 'config.json'
     
     try:
-        # Ensure directory exists
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        # Ensure directory exists (once per directory)
+        parent = os.path.dirname(file_path) or "."
+        if parent not in _ENSURED_DIRS:
+            os.makedirs(parent, exist_ok=True)
+            _ENSURED_DIRS.add(parent)
         
-        with open(file_path, 'w') as f:
-            json.dump(CONFIG, f, indent=2)
-            
+        if orjson:
+            with open(file_path, 'wb') as f:
+                f.write(orjson.dumps(CONFIG, option=orjson.OPT_INDENT_2))
+        else:
+            with open(file_path, 'w') as f:
+                json.dump(CONFIG, f, indent=2)
+        
+        _CONFIG_DIRTY = False
+        _last_config_flush = time.monotonic()
         logger.info(f"Saved configuration to {file_path}")
         return True
     except Exception as e:
@@ -87,9 +117,24 @@ def save_config(config_file=None):
 
 def update_config(config_updates):
     """Update configuration with new values"""
-    for key, value in config_updates.items():
-        if key in CONFIG:
-            CONFIG[key] = value
+    global _CONFIG_DIRTY
+    for key in CONFIG.keys() & config_updates.keys():
+        CONFIG[key] = config_updates[key]
+        _CONFIG_DIRTY = True
             
     logger.info(f"Updated configuration: {config_updates}")
-    return CONFIG
\ No newline at end of file
+    return CONFIG
+
+def maybe_flush_config(config_file=None, min_interval=5.0):
+    """Save the configuration if it changed, at most once every min_interval seconds
+    
+    Use this instead of save_config when persisting after frequent updates, so
+    bursts of changes are written to disk once.
+    """
+    if not _CONFIG_DIRTY:
+        return False
+    
+    if time.monotonic() - _last_config_flush < min_interval:
+        return False
+    
+    return save_config(config_file)
\ No newline at end of file
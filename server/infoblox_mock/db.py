@@ -2,14 +2,19 @@
 Database operations for Infoblox Mock Server
 """
 
+import bisect
+import ipaddress
 import json
 import os
 import logging
 import threading
 from datetime import datetime
+from functools import lru_cache
 
 from infoblox_mock.config import CONFIG
-from infoblox_mock.webhooks import webhook_manager
+from infoblox_mock.utils import get_used_ips_in_db, ipv4_strings_to_ints
+from infoblox_mock.webhooks import (webhook_manager, EVENT_OBJECT_CREATE,
+                                    EVENT_OBJECT_UPDATE, EVENT_OBJECT_DELETE)
 
 logger = logging.getLogger(__name__)
 
@@ -71,17 +76,303 @@ rate_limit_data = {
 }
 
 # Add this near the top of db.py, after the db_lock definition
-# Database hooks for processing objects
+# Database hooks for processing objects, run in registration order
 db_hooks = {
-    "pre_create": None,   # Function to run before creating an object
-    "post_create": None,  # Function to run after creating an object
-    "pre_update": None,   # Function to run before updating an object
-    "post_update": None,  # Function to run after updating an object
-    "pre_delete": None,   # Function to run before deleting an object
-    "post_delete": None,  # Function to run after deleting an object
-    "post_get": None      # Function to run after retrieving an object
+    "pre_create": [],   # Functions to run before creating an object
+    "post_create": [],  # Functions to run after creating an object
+    "pre_update": [],   # Functions to run before updating an object
+    "post_update": [],  # Functions to run after updating an object
+    "pre_delete": [],   # Functions to run before deleting an object
+    "post_delete": [],  # Functions to run after deleting an object
+    "post_get": []      # Functions taking a retrieved object and returning the object to hand out
 }
 
+# Address lookup indexes: name -> (collection, function yielding an object's addresses).
+# Creates extend a current index in place; updates and deletes of its collection make it
+# rebuild lazily on the next lookup. Writes to other collections leave it untouched.
+_ADDRESS_INDEXES = {
+    "network_by_cidr": ("network", lambda obj: (obj.get("network"),)),
+    "ipv6network_by_cidr": ("ipv6network", lambda obj: (obj.get("network"),)),
+    "aaaa_by_addr": ("record:aaaa", lambda obj: (obj.get("ipv6addr"),)),
+    "ipv6fixed_by_addr": ("ipv6fixedaddress", lambda obj: (obj.get("ipv6addr"),)),
+    "host_by_ipv6addr": ("record:host",
+                         lambda obj: (addr.get("ipv6addr") for addr in obj.get("ipv6addrs", [])))
+}
+_address_index_cache = {}  # name -> (stamp, index)
+_ipv6_range_cache = {}     # name -> (stamp, (sorted integer keys, entries))
+_db_generation = 0         # Bumped on every add/update/delete and collection replacement
+_collection_generations = {}  # obj_type -> count of writes and replacements of it
+
+def _mark_db_changed(obj_type):
+    """Invalidate derived lookup indexes of a collection after a write"""
+    global _db_generation
+    _db_generation += 1
+    _collection_generations[obj_type] = _collection_generations.get(obj_type, 0) + 1
+
+def get_address_index(name):
+    """Return {address: [objects]} for a named index, rebuilding it if stale"""
+    collection, addresses_of = _ADDRESS_INDEXES[name]
+    with db_lock:
+        objs = db.get(collection, [])
+        stamp = _index_stamp(collection, objs)
+        cached = _address_index_cache.get(name)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        
+        index = {}
+        for obj in objs:
+            for addr in addresses_of(obj):
+                if addr:
+                    index.setdefault(addr, []).append(obj)
+        _address_index_cache[name] = (stamp, index)
+        return index
+
+def _index_stamp(obj_type, objs):
+    """Stamp identifying the state of a collection for index caching"""
+    # Replacements bump the generation; direct appends (initialize_db) change the length
+    return (_collection_generations.get(obj_type, 0), id(objs), len(objs))
+
+# Collections holding allocated IPv4 addresses, and the cached integer set built from them
+_IPV4_USAGE_COLLECTIONS = ("record:host", "record:a", "fixedaddress", "lease")
+_used_ipv4_cache = {"stamp": None, "ints": frozenset()}
+
+def get_used_ipv4_ints():
+    """Return the allocated IPv4 addresses as integers, rebuilt only after changes"""
+    with db_lock:
+        stamp = tuple(_index_stamp(obj_type, db.get(obj_type, [])) for obj_type in _IPV4_USAGE_COLLECTIONS)
+        if _used_ipv4_cache["stamp"] != stamp:
+            _used_ipv4_cache["ints"] = frozenset(ipv4_strings_to_ints(get_used_ips_in_db(db)))
+            _used_ipv4_cache["stamp"] = stamp
+        return _used_ipv4_cache["ints"]
+
+def db_stamp():
+    """Stamp that changes whenever any part of the database may have changed"""
+    with db_lock:
+        return (_db_generation, _sessions_generation,
+                tuple((key, id(value), len(value)) for key, value in db.items()))
+
+def collection_stamp(obj_type):
+    """Stamp that changes whenever a collection may have changed"""
+    with db_lock:
+        return _index_stamp(obj_type, db.get(obj_type, []))
+
+def _record_created(obj_type, objs, data):
+    """Mark a collection changed after appending data, extending its current indexes in place"""
+    old_stamp = _index_stamp(obj_type, objs)[:2] + (len(objs) - 1,)
+    old_usage_stamp = tuple(
+        old_stamp if name == obj_type else _index_stamp(name, db.get(name, []))
+        for name in _IPV4_USAGE_COLLECTIONS
+    )
+    _mark_db_changed(obj_type)
+    new_stamp = _index_stamp(obj_type, objs)
+    
+    for name, (collection, addresses_of) in _ADDRESS_INDEXES.items():
+        if collection != obj_type:
+            continue
+        
+        cached = _address_index_cache.get(name)
+        if cached is not None and cached[0] == old_stamp:
+            index = cached[1]
+            for addr in addresses_of(data):
+                if addr:
+                    index.setdefault(addr, []).append(data)
+            _address_index_cache[name] = (new_stamp, index)
+        
+        cached = _ipv6_range_cache.get(name)
+        if cached is not None and cached[0] == old_stamp:
+            keys, entries = cached[1]
+            for value, addr in _ipv6_values(addresses_of(data)):
+                # A new object is last in collection order, so it goes after equal addresses;
+                # orders are 0..len-1 since entries only grow until the next rebuild
+                pos = bisect.bisect_right(keys, value)
+                keys.insert(pos, value)
+                entries.insert(pos, (value, len(entries), addr, data))
+            _ipv6_range_cache[name] = (new_stamp, cached[1])
+    
+    if obj_type in _IPV4_USAGE_COLLECTIONS and _used_ipv4_cache["stamp"] == old_usage_stamp:
+        new_ints = ipv4_strings_to_ints(get_used_ips_in_db({obj_type: [data]}))
+        if new_ints:
+            _used_ipv4_cache["ints"] = _used_ipv4_cache["ints"] | new_ints
+        _used_ipv4_cache["stamp"] = tuple(
+            _index_stamp(name, db.get(name, [])) for name in _IPV4_USAGE_COLLECTIONS
+        )
+
+# Natural-key indexes used for duplicate checks: obj_type -> (collection list, indexed length,
+# {key: object}). Creates extend them in place; updates drop them, and a replaced or
+# externally appended collection is detected by identity and length and rebuilt.
+_natural_key_cache = {}
+
+@lru_cache(maxsize=256)
+def _natural_key_fields(obj_type):
+    """Fields whose values must be unique together within a collection, or None"""
+    if obj_type == "network" or obj_type == "network_container":
+        return ("network", "network_view")
+    if obj_type.startswith("record:"):
+        return ("name", "view")
+    return None
+
+def _is_hashable(key):
+    """Check whether a natural key can be used as a dict key (JSON lists and objects can't)"""
+    try:
+        hash(key)
+    except TypeError:
+        return False
+    return True
+
+def _natural_key_index(obj_type, fields):
+    """Return {natural key: object} for a collection; the caller holds db_lock"""
+    objs = db.get(obj_type, [])
+    cached = _natural_key_cache.get(obj_type)
+    if cached is not None and cached[0] is objs and cached[1] == len(objs):
+        return cached[2]
+    
+    index = {}
+    for obj in objs:
+        key = tuple(obj.get(field) for field in fields)
+        if _is_hashable(key):
+            index.setdefault(key, obj)
+    _natural_key_cache[obj_type] = (objs, len(objs), index)
+    return index
+
+def _index_created_object(obj_type, data):
+    """Extend a current natural-key index with an object just appended to its collection"""
+    cached = _natural_key_cache.get(obj_type)
+    objs = db[obj_type]
+    if cached is None or cached[0] is not objs or cached[1] != len(objs) - 1:
+        return
+    key = natural_key(obj_type, data)
+    if _is_hashable(key):
+        cached[2].setdefault(key, data)
+    _natural_key_cache[obj_type] = (objs, len(objs), cached[2])
+
+def natural_key(obj_type, data):
+    """Return the natural key of an object, or None if its type has none"""
+    fields = _natural_key_fields(obj_type)
+    if fields is None:
+        return None
+    return tuple(data.get(field) for field in fields)
+
+def find_duplicate_object(obj_type, data):
+    """Find an existing object with the same natural key as data, if the type has one"""
+    fields = _natural_key_fields(obj_type)
+    if fields is None:
+        return None
+    key = tuple(data.get(field) for field in fields)
+    with db_lock:
+        if not _is_hashable(key):
+            # Unindexable keys fall back to comparing field by field
+            for obj in db.get(obj_type, []):
+                if tuple(obj.get(field) for field in fields) == key:
+                    return obj
+            return None
+        return _natural_key_index(obj_type, fields).get(key)
+
+def find_objects_by_address(name, address):
+    """Find objects in a named address index"""
+    return get_address_index(name).get(address, [])
+
+def _get_ipv6_range_index(name):
+    """Return (sorted integer addresses, entries) for a named IPv6 address index"""
+    collection, addresses_of = _ADDRESS_INDEXES[name]
+    with db_lock:
+        objs = db.get(collection, [])
+        stamp = _index_stamp(collection, objs)
+        cached = _ipv6_range_cache.get(name)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        
+        # (integer address, collection order, address string, object)
+        entries = []
+        for obj in objs:
+            for value, addr in _ipv6_values(addresses_of(obj)):
+                entries.append((value, len(entries), addr, obj))
+        entries.sort(key=lambda entry: entry[:2])
+        index = ([entry[0] for entry in entries], entries)
+        _ipv6_range_cache[name] = (stamp, index)
+        return index
+
+def _ipv6_values(addresses):
+    """Yield (integer value, address) for the valid IPv6 addresses given"""
+    for addr in addresses:
+        if not addr:
+            continue
+        try:
+            yield int(ipaddress.IPv6Address(addr)), addr
+        except ValueError:
+            continue
+
+def find_ipv6_addresses_in_network(name, network):
+    """Find (address, object) pairs of a named IPv6 index inside a network, in collection order"""
+    net = ipaddress.IPv6Network(network, strict=False)
+    with db_lock:
+        # Creates insert into the index in place, so slice it under the lock
+        keys, entries = _get_ipv6_range_index(name)
+        lo = bisect.bisect_left(keys, int(net.network_address))
+        hi = bisect.bisect_right(keys, int(net.broadcast_address))
+        hits = entries[lo:hi]
+    hits = sorted(hits, key=lambda entry: entry[1])
+    return [(addr, obj) for _, _, addr, obj in hits]
+
+# Reverse index of db["activeuser"]: client_ip -> set of usernames.
+# Rebuilt whenever db["activeuser"] is replaced (reset, restore, load).
+_sessions_by_ip = {}
+_sessions_source = None
+_sessions_generation = 0   # Bumped on every login/logout
+
+def _session_index():
+    """Return the client_ip -> usernames index, rebuilding it if stale"""
+    global _sessions_by_ip, _sessions_source
+    active = db.get("activeuser")
+    if active is not _sessions_source:
+        _sessions_by_ip = {}
+        if isinstance(active, dict):
+            for username, sessions in active.items():
+                for client_ip in sessions:
+                    _sessions_by_ip.setdefault(client_ip, set()).add(username)
+        _sessions_source = active
+    return _sessions_by_ip
+
+def add_active_session(username, client_ip):
+    """Record a login session for a user from a client IP"""
+    global _sessions_generation
+    with db_lock:
+        _sessions_generation += 1
+        index = _session_index()
+        sessions = db["activeuser"].setdefault(username, [])
+        if client_ip not in sessions:
+            sessions.append(client_ip)
+        index.setdefault(client_ip, set()).add(username)
+
+def remove_active_sessions(client_ip):
+    """Remove every session from a client IP, returning the affected usernames"""
+    global _sessions_generation
+    with db_lock:
+        _sessions_generation += 1
+        usernames = _session_index().pop(client_ip, ())
+        for username in usernames:
+            sessions = db["activeuser"].get(username, [])
+            if client_ip in sessions:
+                sessions.remove(client_ip)
+        return usernames
+
+def has_active_session(client_ip):
+    """Check whether any user has a session from a client IP"""
+    with db_lock:
+        return bool(_session_index().get(client_ip))
+
+def run_pre_hooks(stage, obj_type, data):
+    """Run validation hooks for a stage, stopping at the first failure"""
+    for hook in db_hooks[stage]:
+        valid, error = hook(obj_type, data)
+        if not valid:
+            return False, error
+    return True, None
+
+def run_post_hooks(stage, obj_type, data):
+    """Run notification hooks for a stage"""
+    for hook in db_hooks[stage]:
+        hook(obj_type, data)
+
 def save_db_to_file():
     """Save the current database state to a file"""
     if not CONFIG['persistent_storage']:
@@ -110,6 +401,8 @@ def load_db_from_file():
         try:
             with open(CONFIG['storage_file'], 'r') as f:
                 db = json.load(f)
+                for key in db:
+                    _mark_db_changed(key)
                 logger.info(f"Database loaded from {CONFIG['storage_file']}")
             return True
         except Exception as e:
@@ -306,6 +599,8 @@ def find_object_by_ref(ref):
                 return obj
     return None
 
+_SPECIAL_QUERY_PARAMS = frozenset(['_max_results', '_return_fields', '_paging', '_return_as_object'])
+
 def find_objects_by_query(obj_type, query_params):
     """Find objects matching query parameters"""
     results = []
@@ -313,18 +608,14 @@ def find_objects_by_query(obj_type, query_params):
     if obj_type not in db:
         return results
     
-    # Copy query params and remove special params
-    actual_query = dict(query_params)
-    special_params = ['_max_results', '_return_fields', '_paging', '_return_as_object']
-    
-    for param in special_params:
-        if param in actual_query:
-            actual_query.pop(param)
+    # Filter out special params without copying the mapping (dicts and MultiDicts both work)
+    actual_query = [(key, value) for key, value in query_params.items()
+                    if key not in _SPECIAL_QUERY_PARAMS]
     
     with db_lock:
         for obj in db[obj_type]:
             match = True
-            for key, value in actual_query.items():
+            for key, value in actual_query:
                 # Handle nested attributes with '.'
                 if '.' in key:
                     parts = key.split('.')
@@ -391,7 +682,7 @@ def add_object(obj_type, data):
     with db_lock:
         # Run pre-create hook if defined
         if db_hooks["pre_create"]:
-            valid, error = db_hooks["pre_create"](obj_type, data)
+            valid, error = run_pre_hooks("pre_create", obj_type, data)
             if not valid:
                 logger.warning(f"Pre-create hook validation failed: {error}")
                 return None
@@ -400,14 +691,16 @@ def add_object(obj_type, data):
             db[obj_type] = []
         
         db[obj_type].append(data)
+        _index_created_object(obj_type, data)
+        _record_created(obj_type, db[obj_type], data)
         save_db_to_file()
         
         # Run post-create hook if defined
         if db_hooks["post_create"]:
-            db_hooks["post_create"](obj_type, data)
+            run_post_hooks("post_create", obj_type, data)
         
         # Send webhook notification
-        webhook_manager.notify_webhook('object:create', {
+        webhook_manager.notify_webhook(EVENT_OBJECT_CREATE, {
             'object_type': obj_type,
             'ref': data.get('_ref', ''),
             'data': data
@@ -415,9 +708,47 @@ def add_object(obj_type, data):
             
         return data["_ref"]
     
+def add_objects(items):
+    """Add many (obj_type, data) objects under one lock acquisition and a single save"""
+    refs = []
+    created = []
+    with db_lock:
+        for obj_type, data in items:
+            # Run pre-create hook if defined
+            if db_hooks["pre_create"]:
+                valid, error = run_pre_hooks("pre_create", obj_type, data)
+                if not valid:
+                    logger.warning(f"Pre-create hook validation failed: {error}")
+                    refs.append(None)
+                    continue
+            
+            objs = db.setdefault(obj_type, [])
+            objs.append(data)
+            _index_created_object(obj_type, data)
+            _record_created(obj_type, objs, data)
+            created.append((obj_type, data))
+            refs.append(data["_ref"])
+        
+        if created:
+            save_db_to_file()
+        
+        for obj_type, data in created:
+            # Run post-create hook if defined
+            if db_hooks["post_create"]:
+                run_post_hooks("post_create", obj_type, data)
+            
+            # Send webhook notification
+            webhook_manager.notify_webhook(EVENT_OBJECT_CREATE, {
+                'object_type': obj_type,
+                'ref': data.get('_ref', ''),
+                'data': data
+            })
+    
+    return refs
+
 def update_object(ref, data):
     """Update an existing object"""
-    obj = find_object_by_ref(ref)
+    obj = _find_stored_object(ref)
     if not obj:
         return None
     
@@ -426,7 +757,7 @@ def update_object(ref, data):
     with db_lock:
         # Run pre-update hook if defined
         if db_hooks["pre_update"]:
-            valid, error = db_hooks["pre_update"](obj_type, data)
+            valid, error = run_pre_hooks("pre_update", obj_type, data)
             if not valid:
                 logger.warning(f"Pre-update hook validation failed: {error}")
                 return None
@@ -443,14 +774,16 @@ def update_object(ref, data):
         
         # Update timestamp
         obj["_modify_time"] = datetime.now().isoformat()
+        _natural_key_cache.pop(obj_type, None)
+        _mark_db_changed(obj_type)
         save_db_to_file()
         
         # Run post-update hook if defined
         if db_hooks["post_update"]:
-            db_hooks["post_update"](obj_type, obj)
+            run_post_hooks("post_update", obj_type, obj)
         
         # Send webhook notification
-        webhook_manager.notify_webhook('object:update', {
+        webhook_manager.notify_webhook(EVENT_OBJECT_UPDATE, {
             'object_type': obj_type,
             'ref': ref,
             'old_data': old_state,
@@ -478,7 +811,7 @@ def delete_object(ref):
         
         # Run pre-delete hook if defined
         if db_hooks["pre_delete"]:
-            valid, error = db_hooks["pre_delete"](obj_type, obj)
+            valid, error = run_pre_hooks("pre_delete", obj_type, obj)
             if not valid:
                 logger.warning(f"Pre-delete hook validation failed: {error}")
                 return None
@@ -488,14 +821,16 @@ def delete_object(ref):
         
         # Remove from database
         db[obj_type] = [o for o in db[obj_type] if o["_ref"] != ref]
+        _natural_key_cache.pop(obj_type, None)
+        _mark_db_changed(obj_type)
         save_db_to_file()
         
         # Run post-delete hook if defined
         if db_hooks["post_delete"]:
-            db_hooks["post_delete"](obj_type, obj)
+            run_post_hooks("post_delete", obj_type, obj)
         
         # Send webhook notification
-        webhook_manager.notify_webhook('object:delete', {
+        webhook_manager.notify_webhook(EVENT_OBJECT_DELETE, {
             'object_type': obj_type,
             'ref': ref,
             'data': deleted_data
@@ -503,8 +838,8 @@ def delete_object(ref):
             
         return ref
 
-def find_object_by_ref(ref):
-    """Find an object by its reference ID"""
+def _find_stored_object(ref):
+    """Find the stored object for a reference ID, without running post_get hooks"""
     obj_type = ref.split('/')[0]
     if obj_type not in db:
         return None
@@ -512,20 +847,28 @@ def find_object_by_ref(ref):
     with db_lock:
         for obj in db[obj_type]:
             if obj["_ref"] == ref:
-                result = obj
-                
-                # Run post_get hook if defined
-                if db_hooks["post_get"]:
-                    result = db_hooks["post_get"](result)
-                    
-                return result
+                return obj
     return None
 
+def find_object_by_ref(ref):
+    """Find an object by its reference ID"""
+    with db_lock:
+        result = _find_stored_object(ref)
+        if result is None:
+            return None
+        
+        # Run post_get hooks if defined; each may return a modified copy
+        for hook in db_hooks["post_get"]:
+            result = hook(result)
+        
+        return result
+
 def reset_db():
     """Reset the database to initial state"""
     with db_lock:
         for key in db:
             db[key] = []
+            _mark_db_changed(key)
         
         initialize_db()
         return True
@@ -534,3 +877,10 @@ def export_db():
     """Export the current database state"""
     with db_lock:
         return dict(db)
+
+def import_db(db_content):
+    """Replace collections with the given content (e.g. from a backup)"""
+    with db_lock:
+        for key, value in db_content.items():
+            db[key] = value
+            _mark_db_changed(key)
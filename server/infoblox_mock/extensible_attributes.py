@@ -3,6 +3,7 @@ Extensible attributes configuration and management for Infoblox Mock Server
 Implements custom extensible attributes with validation and definition
 """
 
+import ipaddress
 import logging
 import json
 import re
@@ -10,15 +11,48 @@ from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Supported EA value types
+_VALID_EA_TYPES = frozenset({"STRING", "INTEGER", "BOOLEAN", "DATE", "EMAIL", "URL", "ENUM"})
+
+# String values accepted for BOOLEAN attributes
+_BOOL_STRINGS = frozenset({"true", "false", "True", "False"})
+
+# Every ISO format datetime.fromisoformat accepts starts with a four-digit year, so strings
+# failing this (used with match) are rejected without a parse. It is never stricter than the parser.
+_DATE_PREFIX_RE = re.compile(r'\d{4}')
+
+# Simple email/URL validation patterns (unanchored, used with fullmatch)
+_EMAIL_RE = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+_URL_RE = re.compile(r'(http|https)://[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}(/.*)?')
+
+def _match_or_false(regex, value):
+    """Return True if value is a string matching the compiled regex"""
+    return isinstance(value, str) and regex.fullmatch(value) is not None
+
 # Extensible attributes definitions
 ea_definitions = {}
 
+# Cached read-only view of ea_definitions, rebuilt lazily after mutations
+_definitions_snapshot = None
+
+# Hashed ENUM allowed values keyed by definition name, for O(1) membership checks.
+# The definitions themselves keep the JSON-serializable list form.
+_allowed_value_sets = {}
+
+def _store_allowed_values(name, allowed_values):
+    """Cache a hashed copy of an ENUM's allowed values; unhashable ones stay list-only"""
+    try:
+        _allowed_value_sets[name] = frozenset(allowed_values)
+    except TypeError:
+        _allowed_value_sets.pop(name, None)
+
 class ExtensibleAttributeDefinitionManager:
     """Manager for extensible attribute definitions"""
     
     @staticmethod
     def create_definition(data):
         """Create a new extensible attribute definition"""
+        _ensure_initialized()
         if not data.get("name"):
             return None, "Attribute name is required"
         
@@ -48,22 +82,27 @@ class ExtensibleAttributeDefinitionManager:
         }
         
         # Validate type
-        valid_types = ["STRING", "INTEGER", "BOOLEAN", "DATE", "EMAIL", "URL", "ENUM"]
-        if definition["type"] not in valid_types:
-            return None, f"Invalid attribute type: {definition['type']}. Must be one of {valid_types}"
+        if definition["type"] not in _VALID_EA_TYPES:
+            return None, f"Invalid attribute type: {definition['type']}. Must be one of {sorted(_VALID_EA_TYPES)}"
         
         # For ENUM type, allowed_values is required
         if definition["type"] == "ENUM" and not definition["allowed_values"]:
             return None, "ENUM type requires allowed_values"
         
         # Add to definitions
+        global _definitions_snapshot
         ea_definitions[name] = definition
+        _definitions_snapshot = None
+        
+        if definition["type"] == "ENUM":
+            _store_allowed_values(name, definition["allowed_values"])
         
         return definition["_ref"], None
     
     @staticmethod
     def get_definition(name):
         """Get an extensible attribute definition by name"""
+        _ensure_initialized()
         if name not in ea_definitions:
             return None, f"Attribute definition not found: {name}"
         
@@ -71,12 +110,17 @@ class ExtensibleAttributeDefinitionManager:
     
     @staticmethod
     def get_all_definitions():
-        """Get all extensible attribute definitions"""
-        return list(ea_definitions.values())
+        """Get all extensible attribute definitions (as a read-only tuple)"""
+        _ensure_initialized()
+        global _definitions_snapshot
+        if _definitions_snapshot is None:
+            _definitions_snapshot = tuple(ea_definitions.values())
+        return _definitions_snapshot
     
     @staticmethod
     def update_definition(name, data):
         """Update an extensible attribute definition"""
+        _ensure_initialized()
         if name not in ea_definitions:
             return None, f"Attribute definition not found: {name}"
         
@@ -90,16 +134,26 @@ class ExtensibleAttributeDefinitionManager:
         
         definition["_modify_time"] = datetime.now().isoformat()
         
+        if "allowed_values" in data and definition["type"] == "ENUM":
+            _store_allowed_values(name, definition["allowed_values"])
+        
+        global _definitions_snapshot
+        _definitions_snapshot = None
+        
         return definition["_ref"], None
     
     @staticmethod
     def delete_definition(name):
         """Delete an extensible attribute definition"""
+        _ensure_initialized()
         if name not in ea_definitions:
             return None, f"Attribute definition not found: {name}"
         
         # Delete the definition
+        global _definitions_snapshot
         del ea_definitions[name]
+        _definitions_snapshot = None
+        _allowed_value_sets.pop(name, None)
         
         # In a real implementation, this would also update objects with this EA
         
@@ -108,20 +162,24 @@ class ExtensibleAttributeDefinitionManager:
     @staticmethod
     def validate_value(name, value):
         """Validate a value against its attribute definition"""
+        _ensure_initialized()
         if name not in ea_definitions:
             return False, f"Attribute definition not found: {name}"
         
         definition = ea_definitions[name]
+        attr_type = definition["type"]
+        required = definition["required"]
+        # A min/max of 0 means "not set"
+        min_value = definition.get("min_value") or None
+        max_value = definition.get("max_value") or None
         
         # Check if value is allowed to be empty
         if value is None or value == "":
-            if definition["required"]:
+            if required:
                 return False, f"Attribute {name} is required"
             return True, None
         
         # Validate based on type
-        attr_type = definition["type"]
-        
         if attr_type == "STRING":
             if not isinstance(value, str):
                 return False, f"Attribute {name} must be a string"
@@ -131,46 +189,50 @@ class ExtensibleAttributeDefinitionManager:
                 int_value = int(value)
                 
                 # Check min/max if defined
-                if definition["min_value"] and int_value < definition["min_value"]:
-                    return False, f"Attribute {name} must be at least {definition['min_value']}"
+                if min_value is not None and int_value < min_value:
+                    return False, f"Attribute {name} must be at least {min_value}"
                 
-                if definition["max_value"] and int_value > definition["max_value"]:
-                    return False, f"Attribute {name} must be at most {definition['max_value']}"
+                if max_value is not None and int_value > max_value:
+                    return False, f"Attribute {name} must be at most {max_value}"
                 
             except (ValueError, TypeError):
                 return False, f"Attribute {name} must be an integer"
         
         elif attr_type == "BOOLEAN":
-            if not isinstance(value, bool) and value not in ["true", "false", "True", "False"]:
+            if not isinstance(value, bool) and value not in _BOOL_STRINGS:
                 return False, f"Attribute {name} must be a boolean"
         
         elif attr_type == "DATE":
+            # Reject obviously malformed values before trying to parse
+            if not isinstance(value, str) or not _DATE_PREFIX_RE.match(value):
+                return False, f"Attribute {name} must be a valid date (ISO format)"
+            
             try:
                 # Try to parse as ISO date
                 datetime.fromisoformat(value.replace('Z', '+00:00'))
-            except (ValueError, AttributeError):
+            except ValueError:
                 return False, f"Attribute {name} must be a valid date (ISO format)"
         
         elif attr_type == "EMAIL":
-            if not isinstance(value, str):
-                return False, f"Attribute {name} must be a string"
-            
-            # Simple email validation
-            email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-            if not re.match(email_pattern, value):
+            if not _match_or_false(_EMAIL_RE, value):
                 return False, f"Attribute {name} must be a valid email address"
         
         elif attr_type == "URL":
-            if not isinstance(value, str):
-                return False, f"Attribute {name} must be a string"
-            
-            # Simple URL validation
-            url_pattern = r'^(http|https)://[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}(/.*)?$'
-            if not re.match(url_pattern, value):
+            if not _match_or_false(_URL_RE, value):
                 return False, f"Attribute {name} must be a valid URL"
         
         elif attr_type == "ENUM":
-            if value not in definition["allowed_values"]:
+            allowed = _allowed_value_sets.get(name)
+            if allowed is None:
+                # Definitions with unhashable allowed values keep list membership
+                is_allowed = value in definition['allowed_values']
+            else:
+                try:
+                    is_allowed = value in allowed
+                except TypeError:
+                    # Unhashable values (lists, dicts) never equal hashable allowed values
+                    is_allowed = False
+            if not is_allowed:
                 return False, f"Attribute {name} must be one of {definition['allowed_values']}"
         
         return True, None
@@ -178,10 +240,13 @@ class ExtensibleAttributeDefinitionManager:
     @staticmethod
     def get_applicable_definitions(obj_type):
         """Get all EA definitions applicable to an object type"""
+        _ensure_initialized()
         applicable = []
+        definitions = ea_definitions
         
-        for name, definition in ea_definitions.items():
-            object_types = definition.get("object_types", [])
+        # object_types is always set by create_definition
+        for definition in definitions.values():
+            object_types = definition["object_types"]
             if not object_types or obj_type in object_types:
                 applicable.append(definition)
         
@@ -190,6 +255,7 @@ class ExtensibleAttributeDefinitionManager:
     @staticmethod
     def validate_extattrs(obj_type, extattrs):
         """Validate all extensible attributes for an object"""
+        _ensure_initialized()
         if not extattrs:
             return True, None
         
@@ -265,30 +331,94 @@ def init_ea_definitions():
         if default["name"] not in ea_definitions:
             ExtensibleAttributeDefinitionManager.create_definition(default)
 
-# Initialize extensible attribute definitions
-init_ea_definitions()
+# Set once the default definitions have been loaded
+_EA_INIT_DONE = False
+
+def _ensure_initialized():
+    """Load the default EA definitions on first use rather than at import"""
+    global _EA_INIT_DONE
+    if not _EA_INIT_DONE:
+        # Set first: init_ea_definitions goes through create_definition
+        _EA_INIT_DONE = True
+        init_ea_definitions()
 
 # Function to validate EA inheritance
 def process_ea_inheritance(parent_obj, child_obj):
     """Process EA inheritance from parent to child object"""
+    parent_ea = parent_obj.get("extattrs")
+    child_ea = child_obj.get("extattrs")
+    
     # Skip if either object doesn't have EAs
-    if not parent_obj.get("extattrs") or not child_obj.get("extattrs"):
+    if not parent_ea or not child_ea:
         return child_obj
     
+    parent_ref = parent_obj.get("_ref", "")
+    
     # Process each parent EA
-    for name, value in parent_obj["extattrs"].items():
+    for name, value in parent_ea.items():
         # Only inherit if the attribute is marked for inheritance
         if isinstance(value, dict) and value.get("inheritance", False):
             # Only inherit if child doesn't already have this EA
-            if name not in child_obj["extattrs"]:
-                child_obj["extattrs"][name] = {
+            if name not in child_ea:
+                child_ea[name] = {
                     "value": value.get("value", ""),
                     "inheritance": True,
-                    "inherited_from": parent_obj.get("_ref", "")
+                    "inherited_from": parent_ref
                 }
     
     return child_obj
 
+# Collection holding the containers an object can inherit EAs from
+_EA_PARENT_COLLECTIONS = {
+    "network": "network_container",
+    "network_container": "network_container",
+    "ipv6network": "ipv6networkcontainer",
+    "ipv6networkcontainer": "ipv6networkcontainer"
+}
+
+def _find_ea_parent(obj):
+    """Find the most specific container enclosing a network object, if any"""
+    parent_type = _EA_PARENT_COLLECTIONS.get(obj.get("_ref", "").split('/')[0])
+    if parent_type is None:
+        return None
+    
+    try:
+        network = ipaddress.ip_network(obj.get("network", ""), strict=False)
+    except ValueError:
+        return None
+    
+    from infoblox_mock.db import db, db_lock
+    
+    parent = None
+    parent_prefixlen = -1
+    with db_lock:
+        for candidate in db.get(parent_type, []):
+            try:
+                container = ipaddress.ip_network(candidate.get("network", ""), strict=False)
+            except ValueError:
+                continue
+            
+            if (container.version == network.version
+                    and parent_prefixlen < container.prefixlen < network.prefixlen
+                    and network.network_address in container):
+                parent = candidate
+                parent_prefixlen = container.prefixlen
+    
+    return parent
+
+def inherit_parent_extattrs(obj):
+    """post_get hook: return obj with the EAs it inherits from its enclosing container"""
+    if not obj.get("extattrs"):
+        return obj
+    
+    parent = _find_ea_parent(obj)
+    if parent is None:
+        return obj
+    
+    # Work on a copy so inherited values aren't written into the stored object
+    child = dict(obj, extattrs=dict(obj["extattrs"]))
+    return process_ea_inheritance(parent, child)
+
 # Add validation hook to database operations
 def validate_extattrs_hook(obj_type, data):
     """Hook to validate EAs before storing"""
@@ -299,14 +429,23 @@ def validate_extattrs_hook(obj_type, data):
     
     return True, None
 
+# Set once the EA hooks have been added to db_hooks
+_HOOKS_REGISTERED = False
+
 # Add hooks for inheritance
 def process_inheritance_hooks():
-    """Register hooks for EA inheritance"""
+    """Register hooks for EA inheritance (safe to call more than once)"""
+    global _HOOKS_REGISTERED
+    if _HOOKS_REGISTERED:
+        return
+    
     from infoblox_mock.db import db_hooks
     
     # Add validation hook
-    db_hooks["pre_create"] = validate_extattrs_hook
-    db_hooks["pre_update"] = validate_extattrs_hook
+    db_hooks["pre_create"].append(validate_extattrs_hook)
+    db_hooks["pre_update"].append(validate_extattrs_hook)
     
     # Add inheritance hook
-    db_hooks["post_get"] = process_ea_inheritance
\ No newline at end of file
+    db_hooks["post_get"].append(inherit_parent_extattrs)
+    
+    _HOOKS_REGISTERED = True
\ No newline at end of file
@@ -5,61 +5,123 @@ Implements multi-grid management, grid replication, HA configuration, monitoring
 
 import logging
 import random
-import string
+import sched
+import copy
+import itertools
 import json
-import os
-from datetime import datetime, timedelta
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+# orjson is optional; fall back to the stdlib json module when it is missing
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
-# Grid data structures
-grids = {
-    "1": {
-        "_ref": "grid/1",
-        "name": "Infoblox Mock Grid",
-        "version": "NIOS 8.6.0",
-        "status": "ONLINE",
-        "license_type": "ENTERPRISE",
-        "allow_recursive_deletion": True,
-        "support_email": "support@example.com",
-        "restart_status": {
-            "restart_required": False
-        },
-        "_create_time": datetime.now().isoformat(),
-        "_modify_time": datetime.now().isoformat()
-    }
+# Guards the grid data structures below; shared by request handlers and
+# the scheduled state transitions
+_state_lock = threading.RLock()
+
+# Shared scheduler for the simulated delayed state transitions (restarts,
+# replication, backups...), run on a single background thread
+_scheduler_wakeup = threading.Event()
+_scheduler_start_lock = threading.Lock()
+_scheduler_thread = None
+
+def _scheduler_delay(seconds):
+    """Sleep until the next event is due or a new event is scheduled"""
+    _scheduler_wakeup.wait(seconds)
+    _scheduler_wakeup.clear()
+
+_scheduler = sched.scheduler(time.monotonic, _scheduler_delay)
+
+def _run_scheduler():
+    """Run scheduled events forever, idling while the queue is empty"""
+    while True:
+        try:
+            _scheduler.run()
+        except Exception as e:
+            logger.error(f"Error in scheduled grid task: {e}")
+            continue
+        _scheduler_wakeup.wait()
+        _scheduler_wakeup.clear()
+
+def _schedule(delay, action, *args):
+    """Run action(*args) after delay seconds on the shared scheduler thread"""
+    global _scheduler_thread
+    with _scheduler_start_lock:
+        if _scheduler_thread is None:
+            _scheduler_thread = threading.Thread(target=_run_scheduler, name="grid-scheduler", daemon=True)
+            _scheduler_thread.start()
+    
+    _scheduler.enter(delay, 1, action, args)
+    _scheduler_wakeup.set()
+
+# Private random generator for simulated values (backup sizes)
+_rng = random.Random()
+
+# Timestamp shared by the default objects created at import
+_INIT_TS = datetime.now().isoformat()
+
+# Default grid and member, copied into grids/grid_members by init_grid
+_DEFAULT_GRID = {
+    "_ref": "grid/1",
+    "name": "Infoblox Mock Grid",
+    "version": "NIOS 8.6.0",
+    "status": "ONLINE",
+    "license_type": "ENTERPRISE",
+    "allow_recursive_deletion": True,
+    "support_email": "support@example.com",
+    "restart_status": {
+        "restart_required": False
+    },
+    "_create_time": _INIT_TS,
+    "_modify_time": _INIT_TS
 }
 
-grid_members = {
-    "1": {
-        "_ref": "member/1",
-        "host_name": "infoblox.example.com",
-        "config_addr_type": "IPV4",
-        "platform": "PHYSICAL",
-        "service_status": "WORKING",
-        "node_status": "ONLINE",
-        "ha_status": "ACTIVE",
-        "ip_address": "192.168.1.2",
-        "mgmt_port": 443,
-        "platform_version": "NIOS 8.6.0",
-        "time_zone": "UTC",
-        "grid_ref": "grid/1",
-        "comment": "Primary grid member",
-        "extattrs": {},
-        "_create_time": datetime.now().isoformat(),
-        "_modify_time": datetime.now().isoformat()
-    }
+_DEFAULT_MEMBER = {
+    "_ref": "member/1",
+    "host_name": "infoblox.example.com",
+    "config_addr_type": "IPV4",
+    "platform": "PHYSICAL",
+    "service_status": "WORKING",
+    "node_status": "ONLINE",
+    "ha_status": "ACTIVE",
+    "ip_address": "192.168.1.2",
+    "mgmt_port": 443,
+    "platform_version": "NIOS 8.6.0",
+    "time_zone": "UTC",
+    "grid_ref": "grid/1",
+    "comment": "Primary grid member",
+    "extattrs": {},
+    "_create_time": _INIT_TS,
+    "_modify_time": _INIT_TS
 }
 
+# Grid data structures
+grids = {"1": copy.deepcopy(_DEFAULT_GRID)}
+
+grid_members = {"1": copy.deepcopy(_DEFAULT_MEMBER)}
+
+# Member IDs per grid_ref; dict keys keep member insertion order
+members_by_grid = defaultdict(dict)
+
 ha_pairs = {}
 
+# Reverse index of member_id -> ID of the HA pair it belongs to
+member_to_ha = {}
+
 replication_status = {
-    "last_sync": datetime.now().isoformat(),
+    "last_sync": _INIT_TS,
     "status": "COMPLETED",
     "members": {
         "1": {
             "status": "IN_SYNC",
-            "last_update": datetime.now().isoformat()
+            "last_update": _INIT_TS
         }
     }
 }
@@ -67,19 +129,22 @@ replication_status = {
 backup_tasks = {}
 restore_tasks = {}
 
-grid_licenses = {
-    "1": {
-        "_ref": "license/1",
-        "type": "ENTERPRISE",
-        "expiry_date": (datetime.now() + timedelta(days=365)).isoformat(),
-        "key": ''.join(random.choices(string.ascii_uppercase + string.digits, k=20)),
-        "features": ["DNS", "DHCP", "IPAM", "RPZ", "GRID", "REPORTING"],
-        "grid_ref": "grid/1",
-        "comment": "Enterprise license",
-        "_create_time": datetime.now().isoformat(),
-        "_modify_time": datetime.now().isoformat()
-    }
-}
+# Backup IDs per status (PENDING, COMPLETED); dict keys keep creation order
+_backups_by_status = defaultdict(dict)
+
+# ID generators; IDs are never reused after a delete ("1" is the default member)
+_member_id_gen = itertools.count(2)
+_ha_id_gen = itertools.count(1)
+_backup_id_gen = itertools.count(1)
+_restore_id_gen = itertools.count(1)
+
+# Fields that update_* calls may not overwrite
+_GRID_IMMUTABLE = frozenset({"_ref", "_create_time"})
+_MEMBER_IMMUTABLE = frozenset({"_ref", "_create_time", "grid_ref"})
+_HA_IMMUTABLE = frozenset({"_ref", "_create_time", "active_member", "passive_member"})
+
+# Sentinel for dict.pop() lookups that fuse the existence check and removal
+_MISSING = object()
 
 grid_services = {
     "dns": {
@@ -89,8 +154,8 @@ grid_services = {
         "status": "WORKING",
         "enabled": True,
         "grid_ref": "grid/1",
-        "_create_time": datetime.now().isoformat(),
-        "_modify_time": datetime.now().isoformat()
+        "_create_time": _INIT_TS,
+        "_modify_time": _INIT_TS
     },
     "dhcp": {
         "_ref": "service/dhcp",
@@ -99,8 +164,8 @@ grid_services = {
         "status": "WORKING",
         "enabled": True,
         "grid_ref": "grid/1",
-        "_create_time": datetime.now().isoformat(),
-        "_modify_time": datetime.now().isoformat()
+        "_create_time": _INIT_TS,
+        "_modify_time": _INIT_TS
     }
 }
 
@@ -112,71 +177,150 @@ grid_status = {
         "ntp": "WORKING",
         "http": "WORKING"
     },
-    "last_update": datetime.now().isoformat()
+    "last_update": _INIT_TS
 }
 
+# (time.monotonic(), snapshot) of the last get_grid_status result
+_status_cache = None
+
+# Seconds a grid status snapshot is reused before last_update is refreshed
+_STATUS_CACHE_TTL = 0.5
+
+# Serialized JSON payloads keyed by "grid:<id>" / "members:<grid_id>",
+# dropped whenever a grid or member changes
+_ser_cache = {}
+
+def _invalidate_read_caches():
+    """Drop cached grid/member reads after a grid or member changes"""
+    _ser_cache.clear()
+
+def _dumps(obj):
+    """Serialize obj to JSON bytes"""
+    if orjson:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode()
+
+# Seconds a new member takes to finish its initial replication
+_MEMBER_SYNC_DELAY = 10
+
+# New members waiting on initial replication: member_id -> time.monotonic() deadline.
+# All of them are completed by one scheduler callback rather than one per member.
+_pending_member_syncs = {}
+_member_sync_scheduled = False
+
+def _queue_member_sync(member_id):
+    """Queue a new member to be marked IN_SYNC once its initialization delay elapses"""
+    global _member_sync_scheduled
+    with _state_lock:
+        _pending_member_syncs[member_id] = time.monotonic() + _MEMBER_SYNC_DELAY
+        if not _member_sync_scheduled:
+            _member_sync_scheduled = True
+            _schedule(_MEMBER_SYNC_DELAY, _complete_member_syncs)
+
+def _complete_member_syncs():
+    """Mark every member whose initialization delay has elapsed as IN_SYNC"""
+    global _member_sync_scheduled
+    with _state_lock:
+        now = time.monotonic()
+        timestamp = datetime.now().isoformat()
+        members = replication_status["members"]
+        
+        # Deadlines share one delay, so insertion order is deadline order
+        while _pending_member_syncs:
+            member_id, deadline = next(iter(_pending_member_syncs.items()))
+            if deadline > now:
+                break
+            
+            del _pending_member_syncs[member_id]
+            member_status = members.get(member_id)
+            if member_status is not None:
+                member_status["status"] = "IN_SYNC"
+                member_status["last_update"] = timestamp
+                logger.info(f"Member {member_id} replication initialized")
+        
+        if _pending_member_syncs:
+            _schedule(deadline - now, _complete_member_syncs)
+        else:
+            _member_sync_scheduled = False
+
 class GridManager:
     """Manager for grid operations"""
     
     @staticmethod
     def get_grid(grid_id="1"):
         """Get grid information"""
-        if grid_id not in grids:
-            return None, f"Grid not found: {grid_id}"
-        
-        return grids[grid_id], None
+        with _state_lock:
+            grid = grids.get(grid_id)
+            if grid is None:
+                return None, f"Grid not found: {grid_id}"
+            
+            return grid, None
     
     @staticmethod
     def update_grid(grid_id, data):
         """Update grid information"""
-        if grid_id not in grids:
-            return None, f"Grid not found: {grid_id}"
-        
-        grid = grids[grid_id]
-        
-        # Update fields
-        for key, value in data.items():
-            if key not in ["_ref", "_create_time"]:
-                grid[key] = value
-        
-        grid["_modify_time"] = datetime.now().isoformat()
-        
-        # Check if restart is required
-        grid["restart_status"]["restart_required"] = True
-        
-        return grid["_ref"], None
+        with _state_lock:
+            grid = grids.get(grid_id)
+            if grid is None:
+                return None, f"Grid not found: {grid_id}"
+            
+            # Update fields
+            grid.update((key, value) for key, value in data.items() if key not in _GRID_IMMUTABLE)
+            
+            grid["_modify_time"] = datetime.now().isoformat()
+            
+            # Check if restart is required
+            grid["restart_status"]["restart_required"] = True
+            _invalidate_read_caches()
+            
+            return grid["_ref"], None
     
     @staticmethod
     def restart_grid(grid_id="1"):
         """Restart the grid services"""
-        if grid_id not in grids:
-            return None, f"Grid not found: {grid_id}"
-        
-        grid = grids[grid_id]
-        
-        # Simulate a restart
-        grid["status"] = "RESTARTING"
-        grid["restart_status"]["restart_required"] = False
-        grid["_modify_time"] = datetime.now().isoformat()
-        
-        # In a real implementation, we would actually restart services
-        # For the mock, we just update the status
-        import threading
-        def delayed_restart():
-            import time
-            time.sleep(5)  # Simulate a 5-second restart
-            grid["status"] = "ONLINE"
+        with _state_lock:
+            grid = grids.get(grid_id)
+            if grid is None:
+                return None, f"Grid not found: {grid_id}"
+            
+            # Simulate a restart
+            grid["status"] = "RESTARTING"
+            grid["restart_status"]["restart_required"] = False
             grid["_modify_time"] = datetime.now().isoformat()
-            logger.info(f"Grid {grid_id} restart completed")
-        
-        threading.Thread(target=delayed_restart).start()
-        
-        return grid["_ref"], None
+            _invalidate_read_caches()
+            
+            # In a real implementation, we would actually restart services
+            # For the mock, we just update the status
+            def delayed_restart():
+                with _state_lock:
+                    grid["status"] = "ONLINE"
+                    grid["_modify_time"] = datetime.now().isoformat()
+                    _invalidate_read_caches()
+                    logger.info(f"Grid {grid_id} restart completed")
+            
+            _schedule(5, delayed_restart)  # Simulate a 5-second restart
+            
+            return grid["_ref"], None
+    
+    @staticmethod
+    def get_grid_json(grid_id="1"):
+        """Get grid information as serialized JSON bytes"""
+        with _state_lock:
+            key = f"grid:{grid_id}"
+            payload = _ser_cache.get(key)
+            if payload is None:
+                grid = grids.get(grid_id)
+                if grid is None:
+                    return None, f"Grid not found: {grid_id}"
+                payload = _ser_cache[key] = _dumps(grid)
+            
+            return payload, None
     
     @staticmethod
     def get_all_grids():
         """Get all grids"""
-        return list(grids.values())
+        with _state_lock:
+            return [grid.copy() for grid in grids.values()]
 
 class GridMemberManager:
     """Manager for grid members"""
@@ -184,144 +328,150 @@ class GridMemberManager:
     @staticmethod
     def create_member(data):
         """Create a new grid member"""
-        if not data.get("host_name"):
-            return None, "Host name is required"
-        
-        if not data.get("ip_address"):
-            return None, "IP address is required"
-        
-        # Generate a unique member ID
-        member_id = str(len(grid_members) + 1)
-        
-        # Create the member
-        member_data = {
-            "_ref": f"member/{member_id}",
-            "host_name": data["host_name"],
-            "ip_address": data["ip_address"],
-            "config_addr_type": data.get("config_addr_type", "IPV4"),
-            "platform": data.get("platform", "PHYSICAL"),
-            "service_status": "WORKING",
-            "node_status": "ONLINE",
-            "ha_status": "ACTIVE",
-            "mgmt_port": data.get("mgmt_port", 443),
-            "platform_version": data.get("platform_version", "NIOS 8.6.0"),
-            "time_zone": data.get("time_zone", "UTC"),
-            "grid_ref": data.get("grid_ref", "grid/1"),
-            "comment": data.get("comment", ""),
-            "extattrs": data.get("extattrs", {}),
-            "_create_time": datetime.now().isoformat(),
-            "_modify_time": datetime.now().isoformat()
-        }
-        
-        # Add to members
-        grid_members[member_id] = member_data
-        
-        # Add to replication status
-        replication_status["members"][member_id] = {
-            "status": "INITIALIZING",
-            "last_update": datetime.now().isoformat()
-        }
-        
-        # In a real implementation, we would initialize replication
-        # For the mock, we just update the status after a delay
-        import threading
-        def delayed_replication():
-            import time
-            time.sleep(10)  # Simulate a 10-second initialization
-            replication_status["members"][member_id]["status"] = "IN_SYNC"
-            replication_status["members"][member_id]["last_update"] = datetime.now().isoformat()
-            logger.info(f"Member {member_id} replication initialized")
-        
-        threading.Thread(target=delayed_replication).start()
-        
-        return member_data["_ref"], None
+        with _state_lock:
+            if not data.get("host_name"):
+                return None, "Host name is required"
+            
+            if not data.get("ip_address"):
+                return None, "IP address is required"
+            
+            now = datetime.now().isoformat()
+            
+            # Generate a unique member ID
+            member_id = str(next(_member_id_gen))
+            
+            # Create the member
+            member_data = {
+                "_ref": f"member/{member_id}",
+                "host_name": data["host_name"],
+                "ip_address": data["ip_address"],
+                "config_addr_type": data.get("config_addr_type", "IPV4"),
+                "platform": data.get("platform", "PHYSICAL"),
+                "service_status": "WORKING",
+                "node_status": "ONLINE",
+                "ha_status": "ACTIVE",
+                "mgmt_port": data.get("mgmt_port", 443),
+                "platform_version": data.get("platform_version", "NIOS 8.6.0"),
+                "time_zone": data.get("time_zone", "UTC"),
+                "grid_ref": data.get("grid_ref", "grid/1"),
+                "comment": data.get("comment", ""),
+                "extattrs": data.get("extattrs", {}),
+                "_create_time": now,
+                "_modify_time": now
+            }
+            
+            # Add to members
+            grid_members[member_id] = member_data
+            members_by_grid[member_data["grid_ref"]][member_id] = None
+            _invalidate_read_caches()
+            
+            # Add to replication status
+            replication_status["members"][member_id] = {
+                "status": "INITIALIZING",
+                "last_update": now
+            }
+            
+            # In a real implementation, we would initialize replication
+            # For the mock, we just update the status after a delay
+            _queue_member_sync(member_id)
+            
+            return member_data["_ref"], None
     
     @staticmethod
     def get_member(member_id):
         """Get a grid member by ID"""
-        if member_id not in grid_members:
-            return None, f"Member not found: {member_id}"
-        
-        return grid_members[member_id], None
+        with _state_lock:
+            member = grid_members.get(member_id)
+            if member is None:
+                return None, f"Member not found: {member_id}"
+            
+            return member, None
     
     @staticmethod
     def get_all_members(grid_id="1"):
         """Get all members for a grid"""
-        grid_ref = f"grid/{grid_id}"
-        members = []
-        
-        for member in grid_members.values():
-            if member["grid_ref"] == grid_ref:
-                members.append(member)
-        
-        return members
+        with _state_lock:
+            return [grid_members[member_id].copy()
+                    for member_id in members_by_grid.get(f"grid/{grid_id}", ())]
+    
+    @staticmethod
+    def get_all_members_json(grid_id="1"):
+        """Get all members for a grid as serialized JSON bytes"""
+        with _state_lock:
+            key = f"members:{grid_id}"
+            payload = _ser_cache.get(key)
+            if payload is None:
+                members = [grid_members[member_id] for member_id in members_by_grid.get(f"grid/{grid_id}", ())]
+                payload = _ser_cache[key] = _dumps(members)
+            
+            return payload
     
     @staticmethod
     def update_member(member_id, data):
         """Update a grid member"""
-        if member_id not in grid_members:
-            return None, f"Member not found: {member_id}"
-        
-        member = grid_members[member_id]
-        
-        # Update fields
-        for key, value in data.items():
-            if key not in ["_ref", "_create_time", "grid_ref"]:
-                member[key] = value
-        
-        member["_modify_time"] = datetime.now().isoformat()
-        
-        return member["_ref"], None
+        with _state_lock:
+            member = grid_members.get(member_id)
+            if member is None:
+                return None, f"Member not found: {member_id}"
+            
+            # Update fields
+            member.update((key, value) for key, value in data.items() if key not in _MEMBER_IMMUTABLE)
+            
+            member["_modify_time"] = datetime.now().isoformat()
+            _invalidate_read_caches()
+            
+            return member["_ref"], None
     
     @staticmethod
     def delete_member(member_id):
         """Delete a grid member"""
-        if member_id not in grid_members:
-            return None, f"Member not found: {member_id}"
-        
-        # Check if this is the last member
-        if len(grid_members) <= 1:
-            return None, "Cannot delete the last grid member"
-        
-        # Check if this member is part of an HA pair
-        for ha_id, ha_pair in ha_pairs.items():
-            if member_id == ha_pair["active_member"] or member_id == ha_pair["passive_member"]:
-                return None, f"Member is part of HA pair {ha_id} and cannot be deleted"
-        
-        # Delete the member
-        del grid_members[member_id]
-        
-        # Remove from replication status
-        if member_id in replication_status["members"]:
-            del replication_status["members"][member_id]
-        
-        return member_id, None
+        with _state_lock:
+            if member_id not in grid_members:
+                return None, f"Member not found: {member_id}"
+            
+            # Check if this is the last member
+            if len(grid_members) <= 1:
+                return None, "Cannot delete the last grid member"
+            
+            # Check if this member is part of an HA pair
+            if member_id in member_to_ha:
+                return None, f"Member is part of HA pair {member_to_ha[member_id]} and cannot be deleted"
+            
+            # Delete the member
+            member = grid_members.pop(member_id)
+            members_by_grid[member["grid_ref"]].pop(member_id, None)
+            _invalidate_read_caches()
+            
+            # Remove from replication status
+            replication_status["members"].pop(member_id, None)
+            
+            return member_id, None
     
     @staticmethod
     def restart_member(member_id):
         """Restart a grid member"""
-        if member_id not in grid_members:
-            return None, f"Member not found: {member_id}"
-        
-        member = grid_members[member_id]
-        
-        # Simulate a restart
-        member["node_status"] = "RESTARTING"
-        member["_modify_time"] = datetime.now().isoformat()
-        
-        # In a real implementation, we would actually restart the member
-        # For the mock, we just update the status
-        import threading
-        def delayed_restart():
-            import time
-            time.sleep(5)  # Simulate a 5-second restart
-            member["node_status"] = "ONLINE"
+        with _state_lock:
+            member = grid_members.get(member_id)
+            if member is None:
+                return None, f"Member not found: {member_id}"
+            
+            # Simulate a restart
+            member["node_status"] = "RESTARTING"
             member["_modify_time"] = datetime.now().isoformat()
-            logger.info(f"Member {member_id} restart completed")
-        
-        threading.Thread(target=delayed_restart).start()
-        
-        return member["_ref"], None
+            _invalidate_read_caches()
+            
+            # In a real implementation, we would actually restart the member
+            # For the mock, we just update the status
+            def delayed_restart():
+                with _state_lock:
+                    member["node_status"] = "ONLINE"
+                    member["_modify_time"] = datetime.now().isoformat()
+                    _invalidate_read_caches()
+                    logger.info(f"Member {member_id} restart completed")
+            
+            _schedule(5, delayed_restart)  # Simulate a 5-second restart
+            
+            return member["_ref"], None
 
 class GridHAManager:
     """Manager for high availability (HA) pairs"""
@@ -329,161 +479,172 @@ class GridHAManager:
     @staticmethod
     def create_ha_pair(data):
         """Create a new HA pair"""
-        if not data.get("name"):
-            return None, "HA pair name is required"
-        
-        if not data.get("active_member"):
-            return None, "Active member is required"
-        
-        if not data.get("passive_member"):
-            return None, "Passive member is required"
-        
-        active_member = data["active_member"]
-        passive_member = data["passive_member"]
-        
-        # Ensure members exist
-        if active_member not in grid_members:
-            return None, f"Active member not found: {active_member}"
-        
-        if passive_member not in grid_members:
-            return None, f"Passive member not found: {passive_member}"
-        
-        # Ensure members are not already in an HA pair
-        for ha_id, ha_pair in ha_pairs.items():
-            if active_member == ha_pair["active_member"] or active_member == ha_pair["passive_member"]:
-                return None, f"Active member is already part of HA pair {ha_id}"
+        with _state_lock:
+            if not data.get("name"):
+                return None, "HA pair name is required"
             
-            if passive_member == ha_pair["active_member"] or passive_member == ha_pair["passive_member"]:
-                return None, f"Passive member is already part of HA pair {ha_id}"
-        
-        # Generate a unique HA pair ID
-        ha_id = str(len(ha_pairs) + 1)
-        
-        # Create the HA pair
-        ha_data = {
-            "_ref": f"ha/{ha_id}",
-            "name": data["name"],
-            "active_member": active_member,
-            "passive_member": passive_member,
-            "status": "SYNCED",
-            "mode": data.get("mode", "ACTIVE_PASSIVE"),
-            "virtual_ip": data.get("virtual_ip", ""),
-            "sync_interval": data.get("sync_interval", 3600),  # seconds
-            "comment": data.get("comment", ""),
-            "extattrs": data.get("extattrs", {}),
-            "_create_time": datetime.now().isoformat(),
-            "_modify_time": datetime.now().isoformat()
-        }
-        
-        # Add to HA pairs
-        ha_pairs[ha_id] = ha_data
-        
-        # Update member HA status
-        active = grid_members[active_member]
-        passive = grid_members[passive_member]
-        
-        active["ha_status"] = "ACTIVE"
-        active["_modify_time"] = datetime.now().isoformat()
-        
-        passive["ha_status"] = "PASSIVE"
-        passive["_modify_time"] = datetime.now().isoformat()
-        
-        return ha_data["_ref"], None
+            if not data.get("active_member"):
+                return None, "Active member is required"
+            
+            if not data.get("passive_member"):
+                return None, "Passive member is required"
+            
+            active_member = data["active_member"]
+            passive_member = data["passive_member"]
+            
+            # Ensure members exist
+            if active_member not in grid_members:
+                return None, f"Active member not found: {active_member}"
+            
+            if passive_member not in grid_members:
+                return None, f"Passive member not found: {passive_member}"
+            
+            # Ensure members are not already in an HA pair
+            conflicts = {active_member, passive_member} & member_to_ha.keys()
+            if conflicts:
+                role, member_id = ("Active", active_member) if active_member in conflicts else ("Passive", passive_member)
+                return None, f"{role} member is already part of HA pair {member_to_ha[member_id]}"
+            
+            now = datetime.now().isoformat()
+            
+            # Generate a unique HA pair ID
+            ha_id = str(next(_ha_id_gen))
+            
+            # Create the HA pair
+            ha_data = {
+                "_ref": f"ha/{ha_id}",
+                "name": data["name"],
+                "active_member": active_member,
+                "passive_member": passive_member,
+                "status": "SYNCED",
+                "mode": data.get("mode", "ACTIVE_PASSIVE"),
+                "virtual_ip": data.get("virtual_ip", ""),
+                "sync_interval": data.get("sync_interval", 3600),  # seconds
+                "comment": data.get("comment", ""),
+                "extattrs": data.get("extattrs", {}),
+                "_create_time": now,
+                "_modify_time": now
+            }
+            
+            # Add to HA pairs
+            ha_pairs[ha_id] = ha_data
+            member_to_ha[active_member] = ha_id
+            member_to_ha[passive_member] = ha_id
+            
+            # Update member HA status
+            active = grid_members[active_member]
+            passive = grid_members[passive_member]
+            
+            active["ha_status"] = "ACTIVE"
+            active["_modify_time"] = now
+            
+            passive["ha_status"] = "PASSIVE"
+            passive["_modify_time"] = now
+            _invalidate_read_caches()
+            
+            return ha_data["_ref"], None
     
     @staticmethod
     def get_ha_pair(ha_id):
         """Get an HA pair by ID"""
-        if ha_id not in ha_pairs:
-            return None, f"HA pair not found: {ha_id}"
-        
-        return ha_pairs[ha_id], None
+        with _state_lock:
+            ha_pair = ha_pairs.get(ha_id)
+            if ha_pair is None:
+                return None, f"HA pair not found: {ha_id}"
+            
+            return ha_pair, None
     
     @staticmethod
     def get_all_ha_pairs():
         """Get all HA pairs"""
-        return list(ha_pairs.values())
+        with _state_lock:
+            return [ha_pair.copy() for ha_pair in ha_pairs.values()]
     
     @staticmethod
     def update_ha_pair(ha_id, data):
         """Update an HA pair"""
-        if ha_id not in ha_pairs:
-            return None, f"HA pair not found: {ha_id}"
-        
-        ha_pair = ha_pairs[ha_id]
-        
-        # Update fields
-        for key, value in data.items():
-            if key not in ["_ref", "_create_time", "active_member", "passive_member"]:
-                ha_pair[key] = value
-        
-        ha_pair["_modify_time"] = datetime.now().isoformat()
-        
-        return ha_pair["_ref"], None
+        with _state_lock:
+            ha_pair = ha_pairs.get(ha_id)
+            if ha_pair is None:
+                return None, f"HA pair not found: {ha_id}"
+            
+            # Update fields
+            ha_pair.update((key, value) for key, value in data.items() if key not in _HA_IMMUTABLE)
+            
+            ha_pair["_modify_time"] = datetime.now().isoformat()
+            
+            return ha_pair["_ref"], None
     
     @staticmethod
     def delete_ha_pair(ha_id):
         """Delete an HA pair"""
-        if ha_id not in ha_pairs:
-            return None, f"HA pair not found: {ha_id}"
-        
-        ha_pair = ha_pairs[ha_id]
-        
-        # Reset member HA status
-        active_member = ha_pair["active_member"]
-        passive_member = ha_pair["passive_member"]
-        
-        if active_member in grid_members:
-            grid_members[active_member]["ha_status"] = "ACTIVE"
-            grid_members[active_member]["_modify_time"] = datetime.now().isoformat()
-        
-        if passive_member in grid_members:
-            grid_members[passive_member]["ha_status"] = "ACTIVE"
-            grid_members[passive_member]["_modify_time"] = datetime.now().isoformat()
-        
-        # Delete the HA pair
-        del ha_pairs[ha_id]
-        
-        return ha_id, None
+        with _state_lock:
+            ha_pair = ha_pairs.pop(ha_id, _MISSING)
+            if ha_pair is _MISSING:
+                return None, f"HA pair not found: {ha_id}"
+            
+            # Reset member HA status
+            active_member = ha_pair["active_member"]
+            passive_member = ha_pair["passive_member"]
+            now = datetime.now().isoformat()
+            
+            if active_member in grid_members:
+                grid_members[active_member]["ha_status"] = "ACTIVE"
+                grid_members[active_member]["_modify_time"] = now
+            
+            if passive_member in grid_members:
+                grid_members[passive_member]["ha_status"] = "ACTIVE"
+                grid_members[passive_member]["_modify_time"] = now
+            
+            _invalidate_read_caches()
+            
+            # Drop the pair from the membership index
+            member_to_ha.pop(active_member, None)
+            member_to_ha.pop(passive_member, None)
+            
+            return ha_id, None
     
     @staticmethod
     def failover(ha_id):
         """Perform a failover for an HA pair"""
-        if ha_id not in ha_pairs:
-            return None, f"HA pair not found: {ha_id}"
-        
-        ha_pair = ha_pairs[ha_id]
-        
-        # Swap active and passive members
-        active_member = ha_pair["active_member"]
-        passive_member = ha_pair["passive_member"]
-        
-        ha_pair["active_member"] = passive_member
-        ha_pair["passive_member"] = active_member
-        ha_pair["status"] = "TRANSITIONING"
-        ha_pair["_modify_time"] = datetime.now().isoformat()
-        
-        # Update member HA status
-        if active_member in grid_members:
-            grid_members[active_member]["ha_status"] = "PASSIVE"
-            grid_members[active_member]["_modify_time"] = datetime.now().isoformat()
-        
-        if passive_member in grid_members:
-            grid_members[passive_member]["ha_status"] = "ACTIVE"
-            grid_members[passive_member]["_modify_time"] = datetime.now().isoformat()
-        
-        # In a real implementation, we would actually perform the failover
-        # For the mock, we just update the status after a delay
-        import threading
-        def delayed_failover():
-            import time
-            time.sleep(10)  # Simulate a 10-second failover
-            ha_pair["status"] = "SYNCED"
-            ha_pair["_modify_time"] = datetime.now().isoformat()
-            logger.info(f"HA pair {ha_id} failover completed")
-        
-        threading.Thread(target=delayed_failover).start()
-        
-        return ha_pair["_ref"], None
+        with _state_lock:
+            ha_pair = ha_pairs.get(ha_id)
+            if ha_pair is None:
+                return None, f"HA pair not found: {ha_id}"
+            
+            # Swap active and passive members
+            active_member = ha_pair["active_member"]
+            passive_member = ha_pair["passive_member"]
+            
+            now = datetime.now().isoformat()
+            
+            ha_pair["active_member"] = passive_member
+            ha_pair["passive_member"] = active_member
+            ha_pair["status"] = "TRANSITIONING"
+            ha_pair["_modify_time"] = now
+            
+            # Update member HA status
+            if active_member in grid_members:
+                grid_members[active_member]["ha_status"] = "PASSIVE"
+                grid_members[active_member]["_modify_time"] = now
+            
+            if passive_member in grid_members:
+                grid_members[passive_member]["ha_status"] = "ACTIVE"
+                grid_members[passive_member]["_modify_time"] = now
+            
+            _invalidate_read_caches()
+            
+            # In a real implementation, we would actually perform the failover
+            # For the mock, we just update the status after a delay
+            def delayed_failover():
+                with _state_lock:
+                    ha_pair["status"] = "SYNCED"
+                    ha_pair["_modify_time"] = datetime.now().isoformat()
+                    logger.info(f"HA pair {ha_id} failover completed")
+            
+            _schedule(10, delayed_failover)  # Simulate a 10-second failover
+            
+            return ha_pair["_ref"], None
 
 class GridReplicationManager:
     """Manager for grid replication"""
@@ -491,44 +652,46 @@ class GridReplicationManager:
     @staticmethod
     def get_replication_status():
         """Get the current replication status"""
-        return replication_status
+        with _state_lock:
+            return replication_status
     
     @staticmethod
     def force_replication():
         """Force a replication of all grid members"""
-        replication_status["status"] = "IN_PROGRESS"
-        replication_status["last_sync"] = datetime.now().isoformat()
-        
-        # Update all member statuses
-        for member_id in replication_status["members"]:
-            replication_status["members"][member_id]["status"] = "REPLICATING"
-        
-        # In a real implementation, we would actually perform the replication
-        # For the mock, we just update the status after a delay
-        import threading
-        def delayed_replication():
-            import time
-            time.sleep(15)  # Simulate a 15-second replication
+        with _state_lock:
+            replication_status["status"] = "IN_PROGRESS"
+            replication_status["last_sync"] = datetime.now().isoformat()
             
-            replication_status["status"] = "COMPLETED"
+            # Update all member statuses
+            for member_status in replication_status["members"].values():
+                member_status["status"] = "REPLICATING"
             
-            for member_id in replication_status["members"]:
-                replication_status["members"][member_id]["status"] = "IN_SYNC"
-                replication_status["members"][member_id]["last_update"] = datetime.now().isoformat()
+            # In a real implementation, we would actually perform the replication
+            # For the mock, we just update the status after a delay
+            def delayed_replication():
+                with _state_lock:
+                    replication_status["status"] = "COMPLETED"
+                    now = datetime.now().isoformat()
+                    
+                    for member_status in replication_status["members"].values():
+                        member_status["status"] = "IN_SYNC"
+                        member_status["last_update"] = now
+                    
+                    logger.info("Grid replication completed")
             
-            logger.info("Grid replication completed")
-        
-        threading.Thread(target=delayed_replication).start()
-        
-        return replication_status
+            _schedule(15, delayed_replication)  # Simulate a 15-second replication
+            
+            return replication_status
     
     @staticmethod
     def get_member_replication_status(member_id):
         """Get replication status for a specific member"""
-        if member_id not in replication_status["members"]:
-            return None, f"Member not found in replication status: {member_id}"
-        
-        return replication_status["members"][member_id], None
+        with _state_lock:
+            member_status = replication_status["members"].get(member_id)
+            if member_status is None:
+                return None, f"Member not found in replication status: {member_id}"
+            
+            return member_status, None
 
 class GridBackupManager:
     """Manager for grid backup and restore"""
@@ -536,140 +699,165 @@ class GridBackupManager:
     @staticmethod
     def create_backup(data):
         """Create a new backup"""
-        if not data.get("name"):
-            return None, "Backup name is required"
-        
-        # Generate a unique backup ID
-        backup_id = str(len(backup_tasks) + 1)
-        
-        # Create the backup task
-        backup_data = {
-            "_ref": f"backup/{backup_id}",
-            "name": data["name"],
-            "type": data.get("type", "FULL"),  # FULL, CONFIG, DNS, DHCP
-            "status": "PENDING",
-            "encryption": data.get("encryption", False),
-            "passphrase": data.get("passphrase", "") if data.get("encryption", False) else "",
-            "comment": data.get("comment", ""),
-            "scheduled": data.get("scheduled", False),
-            "schedule": data.get("schedule", {}),
-            "members": data.get("members", list(grid_members.keys())),
-            "location": "",
-            "file_size": 0,
-            "create_time": datetime.now().isoformat(),
-            "_create_time": datetime.now().isoformat(),
-            "_modify_time": datetime.now().isoformat()
-        }
-        
-        # Add to backup tasks
-        backup_tasks[backup_id] = backup_data
-        
-        # In a real implementation, we would actually perform the backup
-        # For the mock, we just update the status after a delay
-        import threading
-        def delayed_backup():
-            import time
-            time.sleep(10)  # Simulate a 10-second backup
-            
-            backup_tasks[backup_id]["status"] = "COMPLETED"
-            backup_tasks[backup_id]["location"] = f"/var/backup/{backup_data['name']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.tar.gz"
-            backup_tasks[backup_id]["file_size"] = random.randint(10000000, 100000000)  # Random size between 10MB and 100MB
-            backup_tasks[backup_id]["_modify_time"] = datetime.now().isoformat()
-            
-            logger.info(f"Backup {backup_id} completed")
-        
-        threading.Thread(target=delayed_backup).start()
-        
-        return backup_data["_ref"], None
+        with _state_lock:
+            if not data.get("name"):
+                return None, "Backup name is required"
+            
+            now = datetime.now().isoformat()
+            
+            # Default to all members only when the caller did not pick any
+            members = data.get("members")
+            if members is None:
+                members = list(grid_members)
+            
+            # Generate a unique backup ID
+            backup_id = str(next(_backup_id_gen))
+            
+            # Create the backup task
+            backup_data = {
+                "_ref": f"backup/{backup_id}",
+                "name": data["name"],
+                "type": data.get("type", "FULL"),  # FULL, CONFIG, DNS, DHCP
+                "status": "PENDING",
+                "encryption": data.get("encryption", False),
+                "passphrase": data.get("passphrase", "") if data.get("encryption", False) else "",
+                "comment": data.get("comment", ""),
+                "scheduled": data.get("scheduled", False),
+                "schedule": data.get("schedule", {}),
+                "members": members,
+                "location": "",
+                "file_size": 0,
+                "create_time": now,
+                "_create_time": now,
+                "_modify_time": now
+            }
+            
+            # Add to backup tasks
+            backup_tasks[backup_id] = backup_data
+            _backups_by_status["PENDING"][backup_id] = None
+            
+            # In a real implementation, we would actually perform the backup
+            # For the mock, we just update the status after a delay
+            def delayed_backup():
+                with _state_lock:
+                    # Skip backups deleted while pending
+                    if backup_id not in backup_tasks:
+                        return
+                    
+                    completed = datetime.now()
+                    
+                    backup_data["status"] = "COMPLETED"
+                    backup_data["location"] = f"/var/backup/{backup_data['name']}_{completed.strftime('%Y%m%d_%H%M%S')}.tar.gz"
+                    backup_data["file_size"] = _rng.randint(10000000, 100000000)  # Random size between 10MB and 100MB
+                    backup_data["_modify_time"] = completed.isoformat()
+                    
+                    _backups_by_status["PENDING"].pop(backup_id, None)
+                    _backups_by_status["COMPLETED"][backup_id] = None
+                    
+                    logger.info(f"Backup {backup_id} completed")
+            
+            _schedule(10, delayed_backup)  # Simulate a 10-second backup
+            
+            return backup_data["_ref"], None
     
     @staticmethod
     def get_backup(backup_id):
         """Get a backup by ID"""
-        if backup_id not in backup_tasks:
-            return None, f"Backup not found: {backup_id}"
-        
-        return backup_tasks[backup_id], None
+        with _state_lock:
+            backup = backup_tasks.get(backup_id)
+            if backup is None:
+                return None, f"Backup not found: {backup_id}"
+            
+            return backup, None
     
     @staticmethod
-    def get_all_backups():
-        """Get all backups"""
-        return list(backup_tasks.values())
+    def get_all_backups(status=None):
+        """Get all backups, optionally only those with the given status"""
+        with _state_lock:
+            if status is not None:
+                return [backup_tasks[backup_id].copy() for backup_id in _backups_by_status.get(status, ())]
+            
+            return [backup.copy() for backup in backup_tasks.values()]
     
     @staticmethod
     def delete_backup(backup_id):
         """Delete a backup"""
-        if backup_id not in backup_tasks:
-            return None, f"Backup not found: {backup_id}"
-        
-        # Delete the backup
-        del backup_tasks[backup_id]
-        
-        return backup_id, None
+        with _state_lock:
+            # Delete the backup
+            backup = backup_tasks.pop(backup_id, _MISSING)
+            if backup is _MISSING:
+                return None, f"Backup not found: {backup_id}"
+            
+            _backups_by_status[backup["status"]].pop(backup_id, None)
+            
+            return backup_id, None
     
     @staticmethod
     def restore_backup(data):
         """Restore from a backup"""
-        if not data.get("backup_id"):
-            return None, "Backup ID is required"
-        
-        backup_id = data["backup_id"]
-        
-        if backup_id not in backup_tasks:
-            return None, f"Backup not found: {backup_id}"
-        
-        backup = backup_tasks[backup_id]
-        
-        # Check if backup is completed
-        if backup["status"] != "COMPLETED":
-            return None, f"Backup is not completed: {backup_id}"
-        
-        # Generate a unique restore ID
-        restore_id = str(len(restore_tasks) + 1)
-        
-        # Create the restore task
-        restore_data = {
-            "_ref": f"restore/{restore_id}",
-            "backup_ref": f"backup/{backup_id}",
-            "status": "PENDING",
-            "passphrase": data.get("passphrase", "") if backup.get("encryption", False) else "",
-            "options": data.get("options", {}),
-            "members": data.get("members", backup["members"]),
-            "comment": data.get("comment", ""),
-            "_create_time": datetime.now().isoformat(),
-            "_modify_time": datetime.now().isoformat()
-        }
-        
-        # Add to restore tasks
-        restore_tasks[restore_id] = restore_data
-        
-        # In a real implementation, we would actually perform the restore
-        # For the mock, we just update the status after a delay
-        import threading
-        def delayed_restore():
-            import time
-            time.sleep(20)  # Simulate a 20-second restore
+        with _state_lock:
+            if not data.get("backup_id"):
+                return None, "Backup ID is required"
             
-            restore_tasks[restore_id]["status"] = "COMPLETED"
-            restore_tasks[restore_id]["_modify_time"] = datetime.now().isoformat()
+            backup_id = data["backup_id"]
             
-            logger.info(f"Restore {restore_id} completed")
-        
-        threading.Thread(target=delayed_restore).start()
-        
-        return restore_data["_ref"], None
+            backup = backup_tasks.get(backup_id)
+            if backup is None:
+                return None, f"Backup not found: {backup_id}"
+            
+            # Check if backup is completed
+            if backup["status"] != "COMPLETED":
+                return None, f"Backup is not completed: {backup_id}"
+            
+            now = datetime.now().isoformat()
+            
+            # Generate a unique restore ID
+            restore_id = str(next(_restore_id_gen))
+            
+            # Create the restore task
+            restore_data = {
+                "_ref": f"restore/{restore_id}",
+                "backup_ref": f"backup/{backup_id}",
+                "status": "PENDING",
+                "passphrase": data.get("passphrase", "") if backup.get("encryption", False) else "",
+                "options": data.get("options", {}),
+                "members": data.get("members", backup["members"]),
+                "comment": data.get("comment", ""),
+                "_create_time": now,
+                "_modify_time": now
+            }
+            
+            # Add to restore tasks
+            restore_tasks[restore_id] = restore_data
+            
+            # In a real implementation, we would actually perform the restore
+            # For the mock, we just update the status after a delay
+            def delayed_restore():
+                with _state_lock:
+                    restore_tasks[restore_id]["status"] = "COMPLETED"
+                    restore_tasks[restore_id]["_modify_time"] = datetime.now().isoformat()
+                    
+                    logger.info(f"Restore {restore_id} completed")
+            
+            _schedule(20, delayed_restore)  # Simulate a 20-second restore
+            
+            return restore_data["_ref"], None
     
     @staticmethod
     def get_restore(restore_id):
         """Get a restore task by ID"""
-        if restore_id not in restore_tasks:
-            return None, f"Restore task not found: {restore_id}"
-        
-        return restore_tasks[restore_id], None
+        with _state_lock:
+            restore = restore_tasks.get(restore_id)
+            if restore is None:
+                return None, f"Restore task not found: {restore_id}"
+            
+            return restore, None
     
     @staticmethod
     def get_all_restores():
         """Get all restore tasks"""
-        return list(restore_tasks.values())
+        with _state_lock:
+            return [restore.copy() for restore in restore_tasks.values()]
 
 class GridStatusManager:
     """Manager for grid status monitoring"""
@@ -677,78 +865,63 @@ class GridStatusManager:
     @staticmethod
     def get_grid_status():
         """Get the current grid status"""
-        # Update the status timestamp
-        grid_status["last_update"] = datetime.now().isoformat()
-        
-        return grid_status
+        global _status_cache
+        with _state_lock:
+            now = time.monotonic()
+            if _status_cache is None or now - _status_cache[0] >= _STATUS_CACHE_TTL:
+                # Update the status timestamp
+                grid_status["last_update"] = datetime.now().isoformat()
+                
+                snapshot = dict(grid_status, services=dict(grid_status["services"]))
+                _status_cache = (now, snapshot)
+            
+            # Each caller gets its own copy, nested services included
+            snapshot = _status_cache[1]
+            return dict(snapshot, services=dict(snapshot["services"]))
     
     @staticmethod
     def get_service_status(service_name):
         """Get status for a specific service"""
-        if service_name not in grid_status["services"]:
-            return None, f"Service not found: {service_name}"
-        
-        return {
-            "service": service_name,
-            "status": grid_status["services"][service_name],
-            "last_update": grid_status["last_update"]
-        }, None
+        with _state_lock:
+            service_status = grid_status["services"].get(service_name)
+            if service_status is None:
+                return None, f"Service not found: {service_name}"
+            
+            return {
+                "service": service_name,
+                "status": service_status,
+                "last_update": grid_status["last_update"]
+            }, None
     
     @staticmethod
     def get_member_status(member_id):
         """Get status for a specific member"""
-        if member_id not in grid_members:
-            return None, f"Member not found: {member_id}"
-        
-        member = grid_members[member_id]
-        
-        return {
-            "member_id": member_id,
-            "host_name": member["host_name"],
-            "service_status": member["service_status"],
-            "node_status": member["node_status"],
-            "ha_status": member["ha_status"],
-            "last_update": datetime.now().isoformat()
-        }, None
+        with _state_lock:
+            member = grid_members.get(member_id)
+            if member is None:
+                return None, f"Member not found: {member_id}"
+            
+            return {
+                "member_id": member_id,
+                "host_name": member["host_name"],
+                "service_status": member["service_status"],
+                "node_status": member["node_status"],
+                "ha_status": member["ha_status"],
+                "last_update": datetime.now().isoformat()
+            }, None
 
 # Initialize grid
 def init_grid():
     """Initialize grid with default configurations"""
     if "1" not in grids:
-        grids["1"] = {
-            "_ref": "grid/1",
-            "name": "Infoblox Mock Grid",
-            "version": "NIOS 8.6.0",
-            "status": "ONLINE",
-            "license_type": "ENTERPRISE",
-            "allow_recursive_deletion": True,
-            "support_email": "support@example.com",
-            "restart_status": {
-                "restart_required": False
-            },
-            "_create_time": datetime.now().isoformat(),
-            "_modify_time": datetime.now().isoformat()
-        }
+        grids["1"] = copy.deepcopy(_DEFAULT_GRID)
     
     if "1" not in grid_members:
-        grid_members["1"] = {
-            "_ref": "member/1",
-            "host_name": "infoblox.example.com",
-            "config_addr_type": "IPV4",
-            "platform": "PHYSICAL",
-            "service_status": "WORKING",
-            "node_status": "ONLINE",
-            "ha_status": "ACTIVE",
-            "ip_address": "192.168.1.2",
-            "mgmt_port": 443,
-            "platform_version": "NIOS 8.6.0",
-            "time_zone": "UTC",
-            "grid_ref": "grid/1",
-            "comment": "Primary grid member",
-            "extattrs": {},
-            "_create_time": datetime.now().isoformat(),
-            "_modify_time": datetime.now().isoformat()
-        }
+        grid_members["1"] = copy.deepcopy(_DEFAULT_MEMBER)
+    
+    # Index members by grid
+    for member_id, member in grid_members.items():
+        members_by_grid[member["grid_ref"]][member_id] = None
 
 # Initialize grid
 init_grid()
\ No newline at end of file
@@ -0,0 +1,70 @@
+"""
+orjson-backed JSON provider for the Infoblox Mock Server Flask app
+"""
+
+import json
+
+from flask.json.provider import DefaultJSONProvider
+
+# orjson is optional; the app keeps Flask's default provider when it is missing
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+class ORJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that encodes and decodes with orjson"""
+
+    def _options(self, pretty=False):
+        """Build orjson options matching Flask's default provider behaviour"""
+        # Let Flask's default() format datetimes and dataclasses as it always has
+        options = (orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME |
+                   orjson.OPT_PASSTHROUGH_DATACLASS)
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if pretty:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps(self, obj, **kwargs):
+        """Serialize data as JSON to a string"""
+        if kwargs:
+            # Custom json.dumps arguments are only understood by the stdlib encoder
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._options()).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        """Deserialize data from a JSON string or bytes"""
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        """Serialize the arguments straight to a JSON response body"""
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = (self.compact is None and self._app.debug) or self.compact is False
+        body = orjson.dumps(
+            obj,
+            default=self.default,
+            option=self._options(pretty) | orjson.OPT_APPEND_NEWLINE
+        )
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+def dumps_bytes(obj):
+    """Serialize data to compact JSON bytes, with orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, separators=(",", ":")).encode('utf-8')
+
+def dumps_compact_like(app, obj):
+    """Encode obj as compact jsonify would (same key order and escaping), without the newline"""
+    provider = app.json
+    if isinstance(provider, ORJSONProvider):
+        return orjson.dumps(obj, default=provider.default, option=provider._options())
+    return provider.dumps(obj, separators=(",", ":")).encode('utf-8')
+
+def install_json_provider(app):
+    """Use orjson for jsonify/request.json when it is installed"""
+    if orjson is not None:
+        app.json = ORJSONProvider(app)
+    return app
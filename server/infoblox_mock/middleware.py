@@ -9,7 +9,7 @@ from functools import wraps
 from flask import request, jsonify
 
 from infoblox_mock.config import CONFIG
-from infoblox_mock.db import db, db_lock, rate_limit_data
+from infoblox_mock.db import db_lock, rate_limit_data, has_active_session
 
 logger = logging.getLogger(__name__)
 
@@ -92,13 +92,7 @@ def require_auth(func):
             return func(*args, **kwargs)
         
         # Check if user has an active session
-        session_found = False
-        for username, sessions in db['activeuser'].items():
-            if client_ip in sessions:
-                session_found = True
-                break
-        
-        if not session_found:
+        if not has_active_session(client_ip):
             logger.warning(f"Unauthorized access attempt from {client_ip}")
             response = jsonify({"Error": "Unauthorized", "text": "Authentication required"})
             response.status_code = 401
@@ -130,7 +124,7 @@ def log_request(func):
             logger.info(f"Headers: {dict(request.headers)}")
             logger.info(f"Query Params: {request.args}")
             if request.is_json and request.data:
-                logger.info(f"Body: {request.json}")
+                logger.info(f"Body: {request.get_json(silent=True)}")
         return func(*args, **kwargs)
     return wrapper
 
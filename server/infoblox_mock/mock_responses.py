@@ -12,9 +12,12 @@ from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
-# Dictionary to store mock responses
+# Dictionary to store mock responses, keyed by (method, path without WAPI version)
 mock_responses = {}
 
+# Matches the WAPI version segment stripped from request paths
+_WAPI_VERSION_RE = re.compile(r'/wapi/(v[0-9.]+)')
+
 # Flag to enable/disable mock response mode
 mock_response_mode = False
 
@@ -55,20 +58,17 @@ def load_mock_responses(directory):
             req_params = req_info.get('params', {})
             req_body = req_info.get('body', '')
             
-            # Create a unique key based on method, path, and optionally query params and body
-            key = f"{req_method}:{req_path}"
+            # Create a unique key based on method and path; params and body are matched per entry
+            key = (req_method, req_path)
             
             # Add to mock responses
-            if key not in mock_responses:
-                mock_responses[key] = []
-            
-            mock_responses[key].append({
+            mock_responses.setdefault(key, []).append({
                 'query_params': req_params,
                 'body': req_body,
                 'response': response_data['response']
             })
             
-            logger.info(f"Loaded mock response for {key}")
+            logger.info(f"Loaded mock response for {req_method}:{req_path}")
             
         except Exception as e:
             logger.error(f"Error loading mock response from {filename}: {str(e)}")
@@ -87,18 +87,11 @@ def find_mock_response():
     if not mock_response_mode:
         return None
     
-    # Get request information
-    req_method = request.method
-    req_path = request.path
-    
-    # Extract WAPI version from path
-    path_without_version = re.sub(r'/wapi/v[0-9.]+', '', req_path)
-    
-    # Create key
-    key = f"{req_method}:{path_without_version}"
-    
-    if key not in mock_responses:
-        logger.debug(f"No mock response found for {key}")
+    # Extract WAPI version from path and look up the candidates with one dict probe
+    key = (request.method, _WAPI_VERSION_RE.sub('', request.path))
+    candidates = mock_responses.get(key)
+    if candidates is None:
+        logger.debug(f"No mock response found for {key[0]}:{key[1]}")
         return None
     
     # Get query parameters
@@ -110,7 +103,7 @@ def find_mock_response():
         req_body = request.get_json()
     
     # Try to find a matching response
-    for mock in mock_responses[key]:
+    for mock in candidates:
         # Check if query params match
         params_match = True
         mock_params = mock['query_params']
@@ -127,10 +120,10 @@ def find_mock_response():
         
         # If both match, return this response
         if params_match and body_match:
-            logger.info(f"Found matching mock response for {key}")
+            logger.info(f"Found matching mock response for {key[0]}:{key[1]}")
             return mock['response']
     
-    logger.debug(f"No matching mock response found for {key} with given params/body")
+    logger.debug(f"No matching mock response found for {key[0]}:{key[1]} with given params/body")
     return None
 
 def record_interaction(response):
@@ -147,10 +140,10 @@ def record_interaction(response):
     req_path = request.path
     
     # Extract WAPI version from path
-    match = re.search(r'/wapi/(v[0-9.]+)', req_path)
+    match = _WAPI_VERSION_RE.search(req_path)
     if match:
         wapi_version = match.group(1)
-        path_without_version = re.sub(r'/wapi/v[0-9.]+', '', req_path)
+        path_without_version = _WAPI_VERSION_RE.sub('', req_path)
     else:
         wapi_version = "unknown"
         path_without_version = req_path
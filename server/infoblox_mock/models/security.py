@@ -4,16 +4,31 @@ Provides multiple authentication methods including LDAP, AD, RADIUS, and TACACS+
 """
 
 import re
+import sys
 import hashlib
+import bisect
+import heapq
+import hmac
 import os
 import ssl
 import logging
-from datetime import datetime, timedelta
-import base64
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import threading
+import time
+from datetime import datetime
 import json
 import random
+import secrets
 import string
 
+try:
+    from argon2 import PasswordHasher
+    from argon2 import exceptions as argon2_exceptions
+except ImportError:
+    PasswordHasher = None
+    argon2_exceptions = None
+
 logger = logging.getLogger(__name__)
 
 # Simulated authentication databases
@@ -23,8 +38,8 @@ radius_users = {}
 tacacs_users = {}
 local_users = {
     "admin": {
-        "password": "infoblox",  # Default admin password
-        "password_hash": None,   # Will be set on initialization
+        "password": "infoblox",  # Default admin password, cleared once hashed
+        "password_hash": None,   # Set lazily on first login
         "role": "superuser",
         "email": "admin@example.com",
         "last_login": None,
@@ -122,66 +137,188 @@ auth_config = {
 active_sessions = {}
 active_tokens = {}
 
+# Min-heap of (expires_ts, id) used to evict expired sessions
+_session_heap = []
+# Sorted list of (expires_ts, token); kept in order so expiries can be bisected
+_token_expiries = []
+
+# Guard each store together with its heap; request threads mutate both
+_session_lock = threading.Lock()
+_token_lock = threading.Lock()
+
 # Certificate store for SSL/TLS
 certificates = {}
 
+# Argon2id hasher (OWASP parameters); PBKDF2 is used when argon2-cffi is missing
+_ph = PasswordHasher(
+    time_cost=3,
+    memory_cost=64 * 1024,
+    parallelism=2,
+    hash_len=32,
+    salt_len=16
+) if PasswordHasher is not None else None
+
+# scrypt fallback parameters (memory-hard, available with OpenSSL 1.1+)
+_HAS_SCRYPT = hasattr(hashlib, "scrypt")
+_SCRYPT_PREFIX = "$scrypt$"
+_SCRYPT_N = 2 ** 15
+_SCRYPT_R = 8
+_SCRYPT_P = 1
+_SCRYPT_MAXMEM = 64 * 1024 * 1024
+_PBKDF2_ITERATIONS = 100000
+
+# Recently verified local credentials: (username, stored hash, peppered digest) -> expiry
+_verify_cache = {}
+_VERIFY_CACHE_TTL = 30  # seconds
+_VERIFY_CACHE_MAX = 1024
+_verify_cache_lock = threading.Lock()  # Logins also run on the _auth_pool threads
+_PEPPER = os.urandom(32)
+
 def init_auth():
     """Initialize authentication system"""
-    # Hash the default admin password
-    if local_users["admin"]["password_hash"] is None:
-        local_users["admin"]["password_hash"] = hash_password(local_users["admin"]["password"])
+    # Hash any pending plaintext passwords (normally done lazily on first login)
+    for user in local_users.values():
+        _ensure_password_hash(user)
 
-def hash_password(password):
-    """Hash a password with salt"""
-    salt = os.urandom(32)
-    key = hashlib.pbkdf2_hmac(
+def _ensure_password_hash(user):
+    """Hash a user's plaintext password on first use and drop the plaintext"""
+    if user["password_hash"] is None and user.get("password"):
+        user["password_hash"] = hash_password(user["password"])
+        user["password"] = None
+
+def password_needs_rehash(stored_hash):
+    """Check whether a stored hash uses outdated algorithm or parameters"""
+    if _ph is not None:
+        if not stored_hash.startswith("$argon2"):
+            return True
+        return _ph.check_needs_rehash(stored_hash)
+    # Without argon2, upgrade legacy PBKDF2 hashes to scrypt
+    return _HAS_SCRYPT and not stored_hash.startswith(("$argon2", _SCRYPT_PREFIX))
+
+def _scrypt_key(password, salt):
+    """Derive a key with scrypt"""
+    return hashlib.scrypt(
+        password.encode('utf-8'),
+        salt=salt,
+        n=_SCRYPT_N,
+        r=_SCRYPT_R,
+        p=_SCRYPT_P,
+        maxmem=_SCRYPT_MAXMEM,
+        dklen=32
+    )
+
+def _pbkdf2_key(password, salt):
+    """Derive a key with PBKDF2-SHA256"""
+    return hashlib.pbkdf2_hmac(
         'sha256',
         password.encode('utf-8'),
         salt,
-        100000
+        _PBKDF2_ITERATIONS
     )
+
+def hash_password(password):
+    """Hash a password with salt"""
+    if _ph is not None:
+        # PHC-encoded string embeds the salt and parameters
+        return _ph.hash(password)
+
+    salt = os.urandom(32)
+    if _HAS_SCRYPT:
+        return _SCRYPT_PREFIX + salt.hex() + ':' + _scrypt_key(password, salt).hex()
+
     # Store salt with the hash
-    return salt.hex() + ':' + key.hex()
+    return salt.hex() + ':' + _pbkdf2_key(password, salt).hex()
+
+@functools.lru_cache(maxsize=4096)
+def _parse_hash(encoded):
+    """Decode a 'salt:key' hex pair into (salt, key) bytes"""
+    salt_hex, key_hex = encoded.split(':')
+    return bytes.fromhex(salt_hex), bytes.fromhex(key_hex)
 
 def verify_password(stored_hash, password):
     """Verify a password against the stored hash"""
     if not stored_hash:
         return False
     
-    # Split salt and hash
-    salt_hex, key_hex = stored_hash.split(':')
-    salt = bytes.fromhex(salt_hex)
-    stored_key = bytes.fromhex(key_hex)
+    if stored_hash.startswith("$argon2"):
+        if _ph is None:
+            logger.warning("Cannot verify Argon2 hash: argon2-cffi is not installed")
+            return False
+        try:
+            return _ph.verify(stored_hash, password)
+        except argon2_exceptions.VerificationError:
+            return False
+        except argon2_exceptions.InvalidHash:
+            return False
+    
+    if stored_hash.startswith(_SCRYPT_PREFIX):
+        salt, stored_key = _parse_hash(stored_hash[len(_SCRYPT_PREFIX):])
+        return hmac.compare_digest(_scrypt_key(password, salt), stored_key)
+    
+    # Legacy PBKDF2 format: salt and hash
+    salt, stored_key = _parse_hash(stored_hash)
     
     # Hash the provided password with the same salt
-    key = hashlib.pbkdf2_hmac(
-        'sha256',
-        password.encode('utf-8'),
-        salt,
-        100000
-    )
+    key = _pbkdf2_key(password, salt)
     
-    # Compare the keys
-    return key == stored_key
+    # Compare the keys in constant time
+    return hmac.compare_digest(key, stored_key)
+
+def _passwords_match(expected, password):
+    """Compare plaintext passwords in constant time"""
+    return hmac.compare_digest(expected.encode('utf-8'), password.encode('utf-8'))
+
+@functools.lru_cache(maxsize=8)
+def _compile_policy_re(min_length, upper, lower, numbers, special):
+    """Build a single-pass regex enforcing the password policy"""
+    lookaheads = ""
+    if upper:
+        lookaheads += r"(?=.*[A-Z])"
+    if lower:
+        lookaheads += r"(?=.*[a-z])"
+    if numbers:
+        lookaheads += r"(?=.*\d)"
+    if special:
+        lookaheads += r"(?=.*[^A-Za-z0-9])"
+    return re.compile(r"%s.{%d,}" % (lookaheads, min_length), re.S)
+
+def check_password_policy(password):
+    """Check a password against the configured policy, returning (valid, error)"""
+    policy = auth_config["password_policy"]
+    policy_re = _compile_policy_re(
+        policy["min_length"],
+        policy["require_uppercase"],
+        policy["require_lowercase"],
+        policy["require_numbers"],
+        policy["require_special"]
+    )
+    if policy_re.fullmatch(password):
+        return True, None
+    
+    requirements = [f"at least {policy['min_length']} characters"]
+    if policy["require_uppercase"]:
+        requirements.append("an uppercase letter")
+    if policy["require_lowercase"]:
+        requirements.append("a lowercase letter")
+    if policy["require_numbers"]:
+        requirements.append("a number")
+    if policy["require_special"]:
+        requirements.append("a special character")
+    return False, "Password must contain " + ", ".join(requirements)
 
 def authenticate_user(username, password, auth_type="AUTO"):
     """Authenticate a user with the specified auth type"""
     if auth_type == "AUTO":
         # Try each auth method in priority order
         for method in auth_config["auth_method_priority"]:
-            if method == "LOCAL":
-                result = local_authenticate(username, password)
-            elif method == "LDAP" and auth_servers["ldap"]["enabled"]:
-                result = ldap_authenticate(username, password)
-            elif method == "AD" and auth_servers["ad"]["enabled"]:
-                result = ad_authenticate(username, password)
-            elif method == "RADIUS" and auth_servers["radius"]["enabled"]:
-                result = radius_authenticate(username, password)
-            elif method == "TACACS+" and auth_servers["tacacs"]["enabled"]:
-                result = tacacs_authenticate(username, password)
-            else:
+            handler = _AUTH_DISPATCH.get(method)
+            if handler is None:
+                continue
+            server_key, authenticate = handler
+            if server_key is not None and not auth_servers[server_key]["enabled"]:
                 continue
             
+            result = authenticate(username, password)
             if result["success"]:
                 return result
         
@@ -189,18 +326,30 @@ def authenticate_user(username, password, auth_type="AUTO"):
         return {"success": False, "reason": "Authentication failed with all configured methods"}
     
     # Specific auth type requested
-    if auth_type == "LOCAL":
-        return local_authenticate(username, password)
-    elif auth_type == "LDAP":
-        return ldap_authenticate(username, password)
-    elif auth_type == "AD":
-        return ad_authenticate(username, password)
-    elif auth_type == "RADIUS":
-        return radius_authenticate(username, password)
-    elif auth_type == "TACACS+":
-        return tacacs_authenticate(username, password)
-    else:
+    handler = _AUTH_DISPATCH.get(auth_type)
+    if handler is None:
         return {"success": False, "reason": f"Unknown authentication type: {auth_type}"}
+    return handler[1](username, password)
+
+# Worker pool for concurrent logins; the C hash routines release the GIL
+_auth_pool = None
+_auth_pool_lock = threading.Lock()
+
+def _get_auth_pool():
+    """Create the authentication worker pool on first use"""
+    global _auth_pool
+    if _auth_pool is None:
+        with _auth_pool_lock:
+            if _auth_pool is None:
+                _auth_pool = ThreadPoolExecutor(
+                    max_workers=os.cpu_count() or 1,
+                    thread_name_prefix="auth"
+                )
+    return _auth_pool
+
+def authenticate_user_async(username, password, auth_type="AUTO"):
+    """Submit authenticate_user to the worker pool, returning a Future"""
+    return _get_auth_pool().submit(authenticate_user, username, password, auth_type)
 
 def local_authenticate(username, password):
     """Authenticate against local user database"""
@@ -208,8 +357,27 @@ def local_authenticate(username, password):
         return {"success": False, "reason": "User not found"}
     
     user = local_users[username]
+    _ensure_password_hash(user)
+    stored_hash = user["password_hash"]
+    
+    # Keyed on the stored hash too, so a password change invalidates the entry
+    cache_key = (username, stored_hash, hmac.new(_PEPPER, password.encode('utf-8'), 'sha256').digest())
+    now = time.monotonic()
+    with _verify_cache_lock:
+        verified = _verify_cache.get(cache_key, 0) > now
+    if not verified and verify_password(stored_hash, password):
+        with _verify_cache_lock:
+            if len(_verify_cache) >= _VERIFY_CACHE_MAX:
+                # Drop the oldest entry (dicts keep insertion order)
+                _verify_cache.pop(next(iter(_verify_cache), None), None)
+            _verify_cache[cache_key] = now + _VERIFY_CACHE_TTL
+        verified = True
+        
+        # Upgrade legacy or outdated hashes while the plaintext is at hand
+        if password_needs_rehash(stored_hash):
+            user["password_hash"] = hash_password(password)
     
-    if verify_password(user["password_hash"], password):
+    if verified:
         # Update last login time
         user["last_login"] = datetime.now().isoformat()
         return {
@@ -221,211 +389,210 @@ def local_authenticate(username, password):
     else:
         return {"success": False, "reason": "Invalid password"}
 
-def ldap_authenticate(username, password):
-    """Simulate LDAP authentication"""
-    # In a real implementation, this would connect to an LDAP server
-    # Here we just simulate success or failure
-    
-    if not auth_servers["ldap"]["enabled"]:
-        return {"success": False, "reason": "LDAP authentication is disabled"}
-    
-    # Simulate LDAP lookup
-    if username in ldap_users:
-        user = ldap_users[username]
-        if user["password"] == password:
-            return {
-                "success": True,
-                "user": username,
-                "role": user["role"],
-                "auth_type": "LDAP",
-                "groups": user.get("groups", [])
-            }
-    
-    # If configured, fall back to local auth
-    if auth_servers["ldap"]["fallback_to_local"]:
-        local_result = local_authenticate(username, password)
-        if local_result["success"]:
-            return local_result
-    
-    return {"success": False, "reason": "LDAP authentication failed"}
+# auth_servers key -> (auth_type label, simulated user database, report groups)
+_REMOTE_BACKENDS = {
+    "ldap": ("LDAP", ldap_users, True),
+    "ad": ("AD", ad_users, True),
+    "radius": ("RADIUS", radius_users, False),
+    "tacacs": ("TACACS+", tacacs_users, False)
+}
 
-def ad_authenticate(username, password):
-    """Simulate Active Directory authentication"""
-    # In a real implementation, this would connect to an AD server
+def _remote_authenticate(server_key, username, password):
+    """Simulate authentication against a remote LDAP/AD/RADIUS/TACACS+ server"""
+    # In a real implementation, this would contact the configured server
     # Here we just simulate success or failure
+    label, users, report_groups = _REMOTE_BACKENDS[server_key]
+    server = auth_servers[server_key]
     
-    if not auth_servers["ad"]["enabled"]:
-        return {"success": False, "reason": "AD authentication is disabled"}
+    if not server["enabled"]:
+        return {"success": False, "reason": f"{label} authentication is disabled"}
     
-    # Simulate AD lookup
-    if username in ad_users:
-        user = ad_users[username]
-        if user["password"] == password:
-            return {
-                "success": True,
-                "user": username,
-                "role": user["role"],
-                "auth_type": "AD",
-                "groups": user.get("groups", [])
-            }
+    # Simulate remote lookup
+    user = users.get(username)
+    if user is not None and _remote_password_matches(user, password):
+        result = {
+            "success": True,
+            "user": username,
+            "role": user["role"],
+            "auth_type": label
+        }
+        if report_groups:
+            result["groups"] = user.get("groups", [])
+        return result
     
     # If configured, fall back to local auth
-    if auth_servers["ad"]["fallback_to_local"]:
+    if server["fallback_to_local"]:
         local_result = local_authenticate(username, password)
         if local_result["success"]:
             return local_result
     
-    return {"success": False, "reason": "AD authentication failed"}
+    return {"success": False, "reason": f"{label} authentication failed"}
 
-def radius_authenticate(username, password):
-    """Simulate RADIUS authentication"""
-    # In a real implementation, this would send a request to a RADIUS server
-    # Here we just simulate success or failure
-    
-    if not auth_servers["radius"]["enabled"]:
-        return {"success": False, "reason": "RADIUS authentication is disabled"}
-    
-    # Simulate RADIUS lookup
-    if username in radius_users:
-        user = radius_users[username]
-        if user["password"] == password:
-            return {
-                "success": True,
-                "user": username,
-                "role": user["role"],
-                "auth_type": "RADIUS"
-            }
-    
-    # If configured, fall back to local auth
-    if auth_servers["radius"]["fallback_to_local"]:
-        local_result = local_authenticate(username, password)
-        if local_result["success"]:
-            return local_result
-    
-    return {"success": False, "reason": "RADIUS authentication failed"}
+def _remote_password_digest(password):
+    """Keyed BLAKE2b digest used to store simulated remote-user passwords"""
+    return hashlib.blake2b(password.encode('utf-8'), key=_PEPPER, digest_size=32).digest()
 
-def tacacs_authenticate(username, password):
-    """Simulate TACACS+ authentication"""
-    # In a real implementation, this would send a request to a TACACS+ server
-    # Here we just simulate success or failure
-    
-    if not auth_servers["tacacs"]["enabled"]:
-        return {"success": False, "reason": "TACACS+ authentication is disabled"}
-    
-    # Simulate TACACS+ lookup
-    if username in tacacs_users:
-        user = tacacs_users[username]
-        if user["password"] == password:
-            return {
-                "success": True,
-                "user": username,
-                "role": user["role"],
-                "auth_type": "TACACS+"
-            }
-    
-    # If configured, fall back to local auth
-    if auth_servers["tacacs"]["fallback_to_local"]:
-        local_result = local_authenticate(username, password)
-        if local_result["success"]:
-            return local_result
+def _remote_password_matches(user, password):
+    """Check a password against a simulated remote user in constant time"""
+    pw_hash = user.get("pw_hash")
+    if pw_hash is None:
+        # Entries inserted directly may still carry a plaintext password
+        return _passwords_match(user["password"], password)
+    return hmac.compare_digest(_remote_password_digest(password), pw_hash)
+
+def add_remote_user(backend, username, password, role, groups=None):
+    """Add a user to a simulated remote auth backend (ldap, ad, radius, tacacs)"""
+    if backend not in _REMOTE_BACKENDS:
+        return False
     
-    return {"success": False, "reason": "TACACS+ authentication failed"}
+    user = {
+        "pw_hash": _remote_password_digest(password),
+        "role": sys.intern(role)
+    }
+    if groups is not None:
+        user["groups"] = list(groups)
+    _REMOTE_BACKENDS[backend][1][username] = user
+    return True
+
+ldap_authenticate = functools.partial(_remote_authenticate, "ldap")
+ad_authenticate = functools.partial(_remote_authenticate, "ad")
+radius_authenticate = functools.partial(_remote_authenticate, "radius")
+tacacs_authenticate = functools.partial(_remote_authenticate, "tacacs")
+
+# Auth method -> (auth_servers key gating it in AUTO mode, handler)
+_AUTH_DISPATCH = {
+    "LOCAL": (None, local_authenticate),
+    "LDAP": ("ldap", ldap_authenticate),
+    "AD": ("ad", ad_authenticate),
+    "RADIUS": ("radius", radius_authenticate),
+    "TACACS+": ("tacacs", tacacs_authenticate)
+}
+
+def _sweep_expired(heap, store, now):
+    """Evict entries whose expiry has passed, oldest first"""
+    while heap and heap[0][0] < now:
+        _, key = heapq.heappop(heap)
+        store.pop(key, None)
+
+def _sweep_sorted(expiries, store, now):
+    """Evict the expired prefix of a sorted expiry list"""
+    cut = bisect.bisect_left(expiries, (now,))
+    for _, key in expiries[:cut]:
+        store.pop(key, None)
+    del expiries[:cut]
 
 def create_session(username, client_ip, auth_type="LOCAL"):
     """Create a new session for a user"""
-    session_id = os.urandom(16).hex()
-    expire_time = datetime.now() + timedelta(minutes=auth_config["session_timeout"])
+    session_id = secrets.token_hex(16)
+    now = time.time()
     
+    # Epoch timestamps; convert to ISO only when presenting to clients
     session = {
         "username": username,
         "client_ip": client_ip,
-        "auth_type": auth_type,
-        "created": datetime.now().isoformat(),
-        "expires": expire_time.isoformat()
+        "auth_type": sys.intern(auth_type),
+        "created_ts": now,
+        "expires_ts": now + auth_config["session_timeout"] * 60
     }
     
-    active_sessions[session_id] = session
+    with _session_lock:
+        active_sessions[session_id] = session
+        heapq.heappush(_session_heap, (session["expires_ts"], session_id))
     
     return session_id
 
 def validate_session(session_id, client_ip):
     """Validate that a session is active and valid"""
-    if session_id not in active_sessions:
-        return False
-    
-    session = active_sessions[session_id]
-    
-    # Check client IP (optional, can be disabled)
-    if session["client_ip"] != client_ip:
-        return False
-    
-    # Check expiration
-    expire_time = datetime.fromisoformat(session["expires"])
-    if datetime.now() > expire_time:
-        # Session expired, remove it
-        del active_sessions[session_id]
-        return False
+    now = time.time()
+    with _session_lock:
+        _sweep_expired(_session_heap, active_sessions, now)
+        
+        session = active_sessions.get(session_id)
+        if session is None:
+            return False
+        
+        # Check client IP (optional, can be disabled)
+        if session["client_ip"] != client_ip:
+            return False
+        
+        # Check expiration
+        if now > session["expires_ts"]:
+            # Session expired, remove it
+            del active_sessions[session_id]
+            return False
     
     return True
 
 def invalidate_session(session_id):
     """Invalidate a session (logout)"""
-    if session_id in active_sessions:
-        del active_sessions[session_id]
-        return True
-    return False
+    with _session_lock:
+        return active_sessions.pop(session_id, None) is not None
 
 def generate_token(username, scope="api"):
     """Generate an API token for a user"""
-    token = os.urandom(32).hex()
-    expire_time = datetime.now() + timedelta(minutes=auth_config["token_expiry"])
+    token = secrets.token_hex(32)
+    now = time.time()
     
     token_data = {
         "username": username,
         "scope": scope,
-        "created": datetime.now().isoformat(),
-        "expires": expire_time.isoformat()
+        "created_ts": now,
+        "expires_ts": now + auth_config["token_expiry"] * 60
     }
     
-    active_tokens[token] = token_data
+    with _token_lock:
+        active_tokens[token] = token_data
+        bisect.insort(_token_expiries, (token_data["expires_ts"], token))
     
     return token
 
 def validate_token(token):
     """Validate an API token"""
-    if token not in active_tokens:
-        return False
-    
-    token_data = active_tokens[token]
-    
-    # Check expiration
-    expire_time = datetime.fromisoformat(token_data["expires"])
-    if datetime.now() > expire_time:
-        # Token expired, remove it
-        del active_tokens[token]
-        return False
+    now = time.time()
+    with _token_lock:
+        _sweep_sorted(_token_expiries, active_tokens, now)
+        
+        token_data = active_tokens.get(token)
+        if token_data is None:
+            return False
+        
+        # Check expiration
+        if now > token_data["expires_ts"]:
+            # Token expired, remove it
+            del active_tokens[token]
+            return False
     
     return token_data
 
+def list_live_tokens(now=None):
+    """List tokens still valid at the given epoch time (default: now)"""
+    current = time.time()
+    if now is None:
+        now = current
+    with _token_lock:
+        _sweep_sorted(_token_expiries, active_tokens, current)
+        start = bisect.bisect_left(_token_expiries, (now,))
+        return [
+            token for _, token in _token_expiries[start:]
+            if token in active_tokens
+        ]
+
 def invalidate_token(token):
     """Invalidate an API token"""
-    if token in active_tokens:
-        del active_tokens[token]
-        return True
-    return False
+    with _token_lock:
+        return active_tokens.pop(token, None) is not None
 
 def validate_certificate(cert_data):
-    """Validate a client certificate"""
+    """Validate a client certificate (a dict holding its "pem" encoding)"""
     # In a real implementation, this would validate the certificate chain
     # Here we just check if it's in our stored certificates
-    cert_hash = hashlib.sha256(cert_data.encode()).hexdigest()
+    cert_hash = _cert_digest(cert_data)
     
     if cert_hash in certificates:
         cert = certificates[cert_hash]
         
         # Check if certificate is expired
-        expire_date = datetime.fromisoformat(cert["expires"])
-        if datetime.now() > expire_date:
+        if time.time() > cert["expires_ts"]:
             return False
         
         return cert["username"]
@@ -434,18 +601,40 @@ def validate_certificate(cert_data):
 
 # Certificate-based authentication functions
 def add_certificate(username, cert_data, expire_days=365):
-    """Add a certificate for a user"""
-    cert_hash = hashlib.sha256(cert_data.encode()).hexdigest()
+    """Add a certificate for a user from a dict with "pem", "subject" and "issuer" keys"""
+    cert_hash = _cert_digest(cert_data)
+    now = time.time()
     
-    certificates[cert_hash] = {
+    certificates[cert_hash] = _certificate_record(username, cert_data, now, now + expire_days * 86400)
+    
+    return cert_hash
+
+def add_certificates_bulk(cert_list, expire_days=365):
+    """Add many (username, cert_data) certificates at once, returning their hashes"""
+    # PEM blobs are a few KB; hashing them serially beats handing them to threads
+    hashes = [_cert_digest(cert_data) for _, cert_data in cert_list]
+    
+    # One timestamp for the whole batch
+    now = time.time()
+    expires_ts = now + expire_days * 86400
+    for cert_hash, (username, cert_data) in zip(hashes, cert_list):
+        certificates[cert_hash] = _certificate_record(username, cert_data, now, expires_ts)
+    
+    return hashes
+
+def _cert_digest(cert_data):
+    """Return the SHA-256 hex digest of a certificate dict's PEM encoding"""
+    return hashlib.sha256(cert_data["pem"].encode()).hexdigest()
+
+def _certificate_record(username, cert_data, created_ts, expires_ts):
+    """Build the stored record for a certificate"""
+    return {
         "username": username,
-        "created": datetime.now().isoformat(),
-        "expires": (datetime.now() + timedelta(days=expire_days)).isoformat(),
+        "created_ts": created_ts,
+        "expires_ts": expires_ts,
         "subject": cert_data.get("subject", ""),
         "issuer": cert_data.get("issuer", "")
     }
-    
-    return cert_hash
 
 def remove_certificate(cert_hash):
     """Remove a certificate"""
@@ -455,16 +644,19 @@ def remove_certificate(cert_hash):
     return False
 
 # Two-factor authentication functions
+# Maps every byte value onto the base32 alphabet by its low 5 bits (256 % 32 == 0, so unbiased)
+_OTP_SECRET_TABLE = bytes(b"ABCDEFGHIJKLMNOPQRSTUVWXYZ234567"[i & 0x1F] for i in range(256))
+
 def generate_otp_secret():
     """Generate a new OTP secret for two-factor auth"""
     # In a real implementation, this would generate a proper TOTP secret
-    return base64.b32encode(os.urandom(20)).decode('utf-8')
+    # 32 base32 characters (160 bits), sampled directly from the CSPRNG
+    return secrets.token_bytes(32).translate(_OTP_SECRET_TABLE).decode('ascii')
+
+_OTP_DIGITS = frozenset("0123456789")
 
 def verify_otp(secret, code):
     """Verify a one-time password code"""
     # In a real implementation, this would properly verify a TOTP code
     # Here we just simulate success or failure
-    return len(code) == 6 and code.isdigit()
-
-# Initialize the authentication system
-init_auth()
\ No newline at end of file
+    return len(code) == 6 and _OTP_DIGITS.issuperset(code)
\ No newline at end of file
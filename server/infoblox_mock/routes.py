@@ -2,19 +2,27 @@
 API routes for Infoblox Mock Server
 """
 
-from flask import request, jsonify, make_response, render_template_string
+from flask import Response, request, jsonify, make_response
+import copy
+import hashlib
+import ipaddress
 import logging
+import os
 
 from infoblox_mock.config import CONFIG, update_config, is_feature_supported
-from infoblox_mock.db import (db, initialize_db, find_object_by_ref, 
+from infoblox_mock.db import (db, db_lock, initialize_db, find_object_by_ref, 
                               find_objects_by_query, add_object, 
                               update_object, delete_object, 
-                              reset_db, export_db)
+                              reset_db, export_db, find_objects_by_address,
+                              find_ipv6_addresses_in_network,
+                              add_active_session, remove_active_sessions,
+                              collection_stamp, get_used_ipv4_ints, db_stamp,
+                              find_duplicate_object)
+from infoblox_mock.json_provider import dumps_bytes, dumps_compact_like
 from infoblox_mock.middleware import api_route
 from infoblox_mock.validators import validate_and_prepare_data
-from infoblox_mock.utils import (generate_ref, find_next_available_ip, get_used_ips_in_db,
-                                find_next_available_ipv6, get_used_ipv6_in_db, 
-                                is_ipv6_in_network)
+from infoblox_mock.utils import (generate_ref, find_next_available_ip,
+                                find_next_available_ipv6, get_used_ipv6_in_db)
 from infoblox_mock.mock_responses import find_mock_response
 from infoblox_mock.bulk import process_bulk_operation
 from infoblox_mock.statistics import api_stats
@@ -24,8 +32,69 @@ import uuid
 
 logger = logging.getLogger(__name__)
 
+# Per-process salt so stamp-derived ETags never collide across restarts
+_ETAG_SALT = os.urandom(8).hex()
+
+def _stamp_etag(stamp):
+    """Derive an ETag from a database stamp"""
+    return hashlib.blake2b(f"{_ETAG_SALT}{stamp}".encode(), digest_size=8).hexdigest()
+
+def _not_modified(etag):
+    """Return a 304 response if the client already holds this ETag"""
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+    return None
+
+# Pre-encoded pieces of the 404 body; only the escaped path is encoded per request
+_NOT_FOUND_HEAD = b'{"Error":"Not Found","text":'
+_NOT_FOUND_TAIL = b'}\n'
+
+# Basic Swagger UI HTML page; it has no template variables, so it is served as-is
+_SWAGGER_HTML = '''
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Infoblox Mock Server API Documentation</title>
+    <link rel="stylesheet" type="text/css" href="https://cdnjs.cloudflare.com/ajax/libs/swagger-ui/4.18.3/swagger-ui.css">
+</head>
+<body>
+    <div id="swagger-ui"></div>
+    <script src="https://cdnjs.cloudflare.com/ajax/libs/swagger-ui/4.18.3/swagger-ui-bundle.js"></script>
+    <script>
+        window.onload = function() {
+            const ui = SwaggerUIBundle({
+                url: "/swagger.json",
+                dom_id: "#swagger-ui",
+                presets: [
+                    SwaggerUIBundle.presets.apis,
+                    SwaggerUIBundle.SwaggerUIStandalonePreset
+                ],
+                layout: "BaseLayout",
+                deepLinking: true
+            });
+        }
+    </script>
+</body>
+</html>
+'''
+
 def register_routes(app):
     """Register all API routes"""
+    # Subsystems used by the handlers below, imported once at registration
+    from infoblox_mock.webhooks import webhook_manager
+    from infoblox_mock.certificates import CertificateManager
+    from infoblox_mock.smart_folders import SmartFolderManager
+    
+    # WAPI route prefix, formatted once for every versioned route below
+    prefix = f'/wapi/{CONFIG["wapi_version"]}'
+    
+    # Encoded GET grid body, reused until the grid collection changes
+    grid_body_cache = {"stamp": None, "body": None, "etag": None}
+    
+    # Encoded Swagger spec, built on first request for the configured WAPI version
+    swagger_cache = {"version": None, "body": None}
     
     # Add a middleware to handle mock responses
     @app.before_request
@@ -82,12 +151,10 @@ def register_routes(app):
         return jsonify(stats)
 
     # Add webhook routes
-    @app.route(f'/wapi/{CONFIG["wapi_version"]}/webhook', methods=['POST', 'DELETE', 'GET'])
+    @app.route(f'{prefix}/webhook', methods=['POST', 'DELETE', 'GET'])
     @api_route
     def webhook_management():
         """Manage webhook registrations"""
-        from infoblox_mock.webhooks import webhook_manager
-        
         # Require authentication
         auth = request.authorization
         if not auth or auth.username != 'admin':
@@ -109,12 +176,15 @@ def register_routes(app):
             # Validate request
             if not data or 'event_type' not in data or 'url' not in data:
                 return jsonify({"Error": "Missing required fields: event_type, url"}), 400
+            if not isinstance(data['event_type'], str) or not isinstance(data['url'], str):
+                return jsonify({"Error": "Fields event_type and url must be strings"}), 400
             
             # Register webhook
             result = webhook_manager.register_webhook(
                 data['event_type'],
                 data['url'],
-                data.get('headers')
+                data.get('headers'),
+                data.get('batch', False)
             )
             
             if result:
@@ -129,6 +199,8 @@ def register_routes(app):
             # Validate request
             if not data or 'event_type' not in data or 'url' not in data:
                 return jsonify({"Error": "Missing required fields: event_type, url"}), 400
+            if not isinstance(data['event_type'], str) or not isinstance(data['url'], str):
+                return jsonify({"Error": "Fields event_type and url must be strings"}), 400
             
             # Unregister webhook
             result = webhook_manager.unregister_webhook(
@@ -142,12 +214,10 @@ def register_routes(app):
                 return jsonify({"Error": "Webhook not found"}), 404
 
     # Add certificate routes
-    @app.route(f'/wapi/{CONFIG["wapi_version"]}/certificate', methods=['POST', 'GET'])
+    @app.route(f'{prefix}/certificate', methods=['POST', 'GET'])
     @api_route
     def certificate():
         """Handle certificate operations"""
-        from infoblox_mock.certificates import CertificateManager
-        
         # Handle GET (list certificates)
         if request.method == 'GET':
             certificates = CertificateManager.get_all_certificates()
@@ -203,44 +273,54 @@ def register_routes(app):
             return jsonify(ref)
     
     # Next available IP
-    @app.route(f'/wapi/{CONFIG["wapi_version"]}/network/<path:network>/next_available_ip', methods=['POST'])
+    @app.route(f'{prefix}/network/<path:network>/next_available_ip', methods=['POST'])
     @api_route
     def next_available_ip(network):
         """Get next available IP in a network"""
         # Find network
-        network_obj = None
-        for net in db["network"]:
-            if net["network"] == network:
-                network_obj = net
-                break
+        matches = find_objects_by_address("network_by_cidr", network)
+        network_obj = matches[0] if matches else None
         
         if not network_obj:
-            logger.warning(f"Network not found: {network}")
+            logger.warning("Network not found: %s", network)
             return jsonify({"Error": "Network not found"}), 404
         
         # Find used IPs
-        used_ips = get_used_ips_in_db(db)
+        used_ips = get_used_ipv4_ints()
         
         # Find next available IP
         ip_str = find_next_available_ip(network_obj["network"], used_ips)
         
         if ip_str:
-            logger.info(f"Found next available IP in {network}: {ip_str}")
+            logger.info("Found next available IP in %s: %s", network, ip_str)
             return jsonify({"ips": [ip_str]})
         else:
-            logger.warning(f"No available IPs in network: {network}")
+            logger.warning("No available IPs in network: %s", network)
             return jsonify({"Error": "No available IPs in network"}), 400
     
     # Grid information
-    @app.route(f'/wapi/{CONFIG["wapi_version"]}/grid', methods=['GET'])
+    @app.route(f'{prefix}/grid', methods=['GET'])
     @api_route
     def get_grid():
         """Get grid information"""
         logger.info("GET grid info")
-        return jsonify(db["grid"])
+        stamp = collection_stamp("grid")
+        if grid_body_cache["stamp"] != stamp:
+            body = jsonify(db["grid"]).get_data()
+            grid_body_cache["body"] = body
+            grid_body_cache["etag"] = hashlib.blake2b(body, digest_size=8).hexdigest()
+            grid_body_cache["stamp"] = stamp
+        
+        etag = grid_body_cache["etag"]
+        not_modified = _not_modified(etag)
+        if not_modified is not None:
+            return not_modified
+        response = Response(grid_body_cache["body"], mimetype='application/json')
+        response.set_etag(etag)
+        return response
     
     # Grid session (login)
-    @app.route(f'/wapi/{CONFIG["wapi_version"]}/grid/session', methods=['POST', 'DELETE'])
+    @app.route(f'{prefix}/grid/session', methods=['POST', 'DELETE'])
     def grid_session():
         """Handle grid session (login/logout)"""
         client_ip = request.remote_addr
@@ -249,35 +329,29 @@ def register_routes(app):
         if request.method == 'POST':
             auth = request.authorization
             if not auth:
-                logger.warning(f"Login attempt without credentials from {client_ip}")
+                logger.warning("Login attempt without credentials from %s", client_ip)
                 return jsonify({"Error": "Authentication required"}), 401
             
             # In a real system, we would validate credentials here
             username = auth.username
             
             # Add session
-            if username not in db["activeuser"]:
-                db["activeuser"][username] = []
-            
-            if client_ip not in db["activeuser"][username]:
-                db["activeuser"][username].append(client_ip)
+            add_active_session(username, client_ip)
             
-            logger.info(f"User {username} logged in from {client_ip}")
+            logger.info("User %s logged in from %s", username, client_ip)
             return jsonify({"username": username})
         
         # Logout
         elif request.method == 'DELETE':
             # Remove session
-            for username, sessions in db["activeuser"].items():
-                if client_ip in sessions:
-                    sessions.remove(client_ip)
-                    logger.info(f"User {username} logged out from {client_ip}")
+            for username in remove_active_sessions(client_ip):
+                logger.info("User %s logged out from %s", username, client_ip)
             
             # No content response for successful logout
             return "", 204
     
     # Configuration endpoints
-    @app.route(f'/wapi/{CONFIG["wapi_version"]}/config', methods=['GET', 'PUT'])
+    @app.route(f'{prefix}/config', methods=['GET', 'PUT'])
     @api_route
     def handle_config():
         """Get or update server configuration"""
@@ -288,11 +362,11 @@ def register_routes(app):
         elif request.method == 'PUT':
             data = request.json
             updated_config = update_config(data)
-            logger.info(f"Updated server configuration: {data}")
+            logger.info("Updated server configuration: %s", data)
             return jsonify(updated_config)
     
     # Database management endpoints
-    @app.route(f'/wapi/{CONFIG["wapi_version"]}/db/reset', methods=['POST'])
+    @app.route(f'{prefix}/db/reset', methods=['POST'])
     @api_route
     def handle_db_reset():
         """Reset the database to initial state"""
@@ -303,16 +377,45 @@ def register_routes(app):
             logger.error("Failed to reset database")
             return jsonify({"Error": "Failed to reset database"}), 500
     
-    @app.route(f'/wapi/{CONFIG["wapi_version"]}/db/export', methods=['GET'])
+    @app.route(f'{prefix}/db/export', methods=['GET'])
     @api_route
     def handle_db_export():
         """Export the current database state"""
+        etag = _stamp_etag(db_stamp())
+        not_modified = _not_modified(etag)
+        if not_modified is not None:
+            return not_modified
+        
         db_export = export_db()
         logger.info("Database exported")
-        return jsonify(db_export)
+        
+        # Pretty-printed (debug) output can't be spliced from compact pieces
+        if (app.json.compact is None and app.debug) or app.json.compact is False:
+            response = jsonify(db_export)
+            response.set_etag(etag)
+            return response
+        
+        # Pin each collection's membership now; encoding happens lazily per collection
+        keys = sorted(db_export) if app.json.sort_keys else list(db_export)
+        with db_lock:
+            snapshot = [(key, copy.copy(db_export[key])) for key in keys]
+        
+        def generate():
+            # Only one encoded collection is held in memory at a time
+            separator = b'{'
+            for key, value in snapshot:
+                with db_lock:
+                    chunk = dumps_compact_like(app, value)
+                yield separator + dumps_compact_like(app, key) + b':' + chunk
+                separator = b','
+            yield b'{}\n' if separator == b'{' else b'}\n'
+        
+        response = Response(generate(), mimetype='application/json')
+        response.set_etag(etag)
+        return response
 
     # Add new route handling for IPv6 next available IP
-    @app.route(f'/wapi/{CONFIG["wapi_version"]}/ipv6network/<path:network>/next_available_ip', methods=['POST'])
+    @app.route(f'{prefix}/ipv6network/<path:network>/next_available_ip', methods=['POST'])
     @api_route
     def next_available_ipv6(network):
         """Get next available IPv6 in a network"""
@@ -321,14 +424,11 @@ def register_routes(app):
             return jsonify({"Error": "Function not available in this WAPI version"}), 400
         
         # Find network
-        network_obj = None
-        for net in db["ipv6network"]:
-            if net["network"] == network:
-                network_obj = net
-                break
+        matches = find_objects_by_address("ipv6network_by_cidr", network)
+        network_obj = matches[0] if matches else None
         
         if not network_obj:
-            logger.warning(f"IPv6 network not found: {network}")
+            logger.warning("IPv6 network not found: %s", network)
             return jsonify({"Error": "IPv6 network not found"}), 404
         
         # Find used IPv6 addresses
@@ -338,94 +438,63 @@ def register_routes(app):
         ip_str = find_next_available_ipv6(network_obj["network"], used_ips)
         
         if ip_str:
-            logger.info(f"Found next available IPv6 in {network}: {ip_str}")
+            logger.info("Found next available IPv6 in %s: %s", network, ip_str)
             return jsonify({"ips": [ip_str]})
         else:
-            logger.warning(f"No available IPv6 addresses in network: {network}")
+            logger.warning("No available IPv6 addresses in network: %s", network)
             return jsonify({"Error": "No available IPv6 addresses in network"}), 400
 
     # Add route for IPv6 address search
-    @app.route(f'/wapi/{CONFIG["wapi_version"]}/ipv6address', methods=['GET'])
+    @app.route(f'{prefix}/ipv6address', methods=['GET'])
     @api_route
     def search_ipv6():
         """Search for IPv6 addresses"""
-        query_params = request.args.to_dict()
+        args = request.args
+        ip = args.get('ip_address')
+        network = args.get('network')
         
         # Handle search by specific IPv6 address
-        if 'ip_address' in query_params:
-            ip = query_params['ip_address']
+        if ip is not None:
             results = []
             
-            # Search in all IPv6-related collections
-            for collection_type in ["record:aaaa", "ipv6fixedaddress"]:
-                for obj in db.get(collection_type, []):
-                    if obj.get("ipv6addr") == ip:
-                        results.append({
-                            "objects": [obj["_ref"]],
-                            "ip_address": ip,
-                            "types": [collection_type]
-                        })
-            
-            # Search in host records with IPv6 addresses
-            for obj in db.get("record:host", []):
-                for addr in obj.get("ipv6addrs", []):
-                    if addr.get("ipv6addr") == ip:
-                        results.append({
-                            "objects": [obj["_ref"]],
-                            "ip_address": ip,
-                            "types": ["record:host"]
-                        })
+            # Search in all IPv6-related collections, then host records
+            for index_name, collection_type in (("aaaa_by_addr", "record:aaaa"),
+                                                ("ipv6fixed_by_addr", "ipv6fixedaddress"),
+                                                ("host_by_ipv6addr", "record:host")):
+                for obj in find_objects_by_address(index_name, ip):
+                    results.append({
+                        "objects": [obj["_ref"]],
+                        "ip_address": ip,
+                        "types": [collection_type]
+                    })
             
             return jsonify(results)
         
         # Handle search by network
-        elif 'network' in query_params:
-            network = query_params['network']
-            results = []
+        elif network is not None:
             
             try:
                 net = ipaddress.ip_network(network, strict=False)
                 if net.version != 6:
                     return jsonify({"Error": "Not an IPv6 network"}), 400
                 
-                # Collect all IPv6 addresses in collections
+                # Collect all IPv6 addresses in collections from AAAA records,
+                # fixed addresses and host records (range queries on sorted indexes)
                 all_ips = []
-                
-                # From AAAA records
-                for obj in db.get("record:aaaa", []):
-                    ip = obj.get("ipv6addr", "")
-                    if ip and is_ipv6_in_network(ip, network):
+                for index_name, collection_type in (("aaaa_by_addr", "record:aaaa"),
+                                                    ("ipv6fixed_by_addr", "ipv6fixedaddress"),
+                                                    ("host_by_ipv6addr", "record:host")):
+                    for ip, obj in find_ipv6_addresses_in_network(index_name, net):
                         all_ips.append({
                             "objects": [obj["_ref"]],
                             "ip_address": ip,
-                            "types": ["record:aaaa"]
-                        })
-                
-                # From fixed addresses
-                for obj in db.get("ipv6fixedaddress", []):
-                    ip = obj.get("ipv6addr", "")
-                    if ip and is_ipv6_in_network(ip, network):
-                        all_ips.append({
-                            "objects": [obj["_ref"]],
-                            "ip_address": ip,
-                            "types": ["ipv6fixedaddress"]
+                            "types": [collection_type]
                         })
                 
-                # From host records
-                for obj in db.get("record:host", []):
-                    for addr in obj.get("ipv6addrs", []):
-                        ip = addr.get("ipv6addr", "")
-                        if ip and is_ipv6_in_network(ip, network):
-                            all_ips.append({
-                                "objects": [obj["_ref"]],
-                                "ip_address": ip,
-                                "types": ["record:host"]
-                            })
-                
                 return jsonify(all_ips)
                 
             except Exception as e:
-                logger.error(f"Error searching IPv6 network: {str(e)}")
+                logger.error("Error searching IPv6 network: %s", e)
                 return jsonify({"Error": str(e)}), 400
         
         else:
@@ -434,21 +503,20 @@ def register_routes(app):
     # Return 404 for undefined routes
     @app.errorhandler(404)
     def handle_404(error):
-        logger.warning(f"404 error: {request.path}")
-        return jsonify({"Error": "Not Found", "text": f"Resource not found: {request.path}"}), 404
+        logger.warning("404 error: %s", request.path)
+        body = _NOT_FOUND_HEAD + dumps_bytes(f"Resource not found: {request.path}") + _NOT_FOUND_TAIL
+        return Response(body, status=404, mimetype='application/json')
     
     # Return 500 for server errors
     @app.errorhandler(500)
     def handle_500(error):
-        logger.error(f"500 error: {str(error)}")
+        logger.error("500 error: %s", error)
         return jsonify({"Error": "Internal Server Error", "text": str(error)}), 500
 
-    @app.route(f'/wapi/{CONFIG["wapi_version"]}/certificate/<cert_id>', methods=['GET', 'PUT', 'DELETE'])
+    @app.route(f'{prefix}/certificate/<cert_id>', methods=['GET', 'PUT', 'DELETE'])
     @api_route
     def certificate_by_id(cert_id):
         """Handle operations on a specific certificate"""
-        from infoblox_mock.certificates import CertificateManager
-        
         # Handle GET (get certificate)
         if request.method == 'GET':
             cert, error = CertificateManager.get_certificate(cert_id)
@@ -480,12 +548,10 @@ def register_routes(app):
             
             return jsonify(ref)
 
-    @app.route(f'/wapi/{CONFIG["wapi_version"]}/smartfolder', methods=['POST', 'GET'])
+    @app.route(f'{prefix}/smartfolder', methods=['POST', 'GET'])
     @api_route
     def smart_folder():
         """Handle Smart Folder operations"""
-        from infoblox_mock.smart_folders import SmartFolderManager
-        
         # Handle GET (list folders)
         if request.method == 'GET':
             # Get owner from query params
@@ -495,7 +561,11 @@ def register_routes(app):
             
             # Get all folders
             folders = SmartFolderManager.get_all_folders(owner, shared)
-            return jsonify(folders)
+            
+            # Folders change without a signal, so the ETag is a hash of the body
+            response = jsonify(folders)
+            response.set_etag(hashlib.blake2b(response.get_data(), digest_size=8).hexdigest())
+            return response.make_conditional(request)
         
         # Handle POST (create folder)
         elif request.method == 'POST':
@@ -512,12 +582,10 @@ def register_routes(app):
             
             return jsonify(ref)
 
-    @app.route(f'/wapi/{CONFIG["wapi_version"]}/smartfolder/<folder_id>', methods=['GET', 'PUT', 'DELETE'])
+    @app.route(f'{prefix}/smartfolder/<folder_id>', methods=['GET', 'PUT', 'DELETE'])
     @api_route
     def smart_folder_by_id(folder_id):
         """Handle operations on a specific Smart Folder"""
-        from infoblox_mock.smart_folders import SmartFolderManager
-        
         # Handle GET (get folder)
         if request.method == 'GET':
             folder, error = SmartFolderManager.get_folder(folder_id)
@@ -549,12 +617,10 @@ def register_routes(app):
             
             return jsonify(ref)
 
-    @app.route(f'/wapi/{CONFIG["wapi_version"]}/smartfolder/<folder_id>/content', methods=['GET'])
+    @app.route(f'{prefix}/smartfolder/<folder_id>/content', methods=['GET'])
     @api_route
     def smart_folder_content(folder_id):
         """Get the contents of a Smart Folder"""
-        from infoblox_mock.smart_folders import SmartFolderManager
-        
         # Get folder contents
         contents, error = SmartFolderManager.get_folder_contents(folder_id)
         if error:
@@ -565,42 +631,18 @@ def register_routes(app):
     @app.route('/swagger', methods=['GET'])
     def swagger_ui():
         """Swagger UI for API documentation"""
-        # Basic Swagger UI HTML template
-        swagger_html = '''
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>Infoblox Mock Server API Documentation</title>
-            <link rel="stylesheet" type="text/css" href="https://cdnjs.cloudflare.com/ajax/libs/swagger-ui/4.18.3/swagger-ui.css">
-        </head>
-        <body>
-            <div id="swagger-ui"></div>
-            <script src="https://cdnjs.cloudflare.com/ajax/libs/swagger-ui/4.18.3/swagger-ui-bundle.js"></script>
-            <script>
-                window.onload = function() {
-                    const ui = SwaggerUIBundle({
-                        url: "/swagger.json",
-                        dom_id: "#swagger-ui",
-                        presets: [
-                            SwaggerUIBundle.presets.apis,
-                            SwaggerUIBundle.SwaggerUIStandalonePreset
-                        ],
-                        layout: "BaseLayout",
-                        deepLinking: true
-                    });
-                }
-            </script>
-        </body>
-        </html>
-        '''
-        return render_template_string(swagger_html)
+        return Response(_SWAGGER_HTML, mimetype='text/html')
 
     @app.route('/swagger.json', methods=['GET'])
     def swagger_json():
         """Get Swagger/OpenAPI specification as JSON"""
-        return jsonify(generate_swagger_spec())
+        version = CONFIG.get('wapi_version')
+        if swagger_cache["version"] != version:
+            swagger_cache["body"] = jsonify(generate_swagger_spec()).get_data()
+            swagger_cache["version"] = version
+        return Response(swagger_cache["body"], mimetype='application/json')
     
-    @app.route(f'/wapi/{CONFIG["wapi_version"]}/grid/backup', methods=['POST', 'GET'])
+    @app.route(f'{prefix}/grid/backup', methods=['POST', 'GET'])
     @api_route
     def grid_backup():
         """Handle grid backup operations"""
@@ -637,7 +679,7 @@ def register_routes(app):
             
             return jsonify({"id": backup_id})
 
-    @app.route(f'/wapi/{CONFIG["wapi_version"]}/grid/restore', methods=['POST', 'GET'])
+    @app.route(f'{prefix}/grid/restore', methods=['POST', 'GET'])
     @api_route
     def grid_restore():
         """Handle grid restore operations"""
@@ -675,7 +717,7 @@ def register_routes(app):
             
             return jsonify({"id": restore_id})
             
-    @app.route(f'/wapi/{CONFIG["wapi_version"]}/bulkhost', methods=['POST'])
+    @app.route(f'{prefix}/bulkhost', methods=['POST'])
     @api_route
     def bulk_host():
         """Handle bulk host operations"""
@@ -703,136 +745,143 @@ def register_routes(app):
             return jsonify(results)
         
         except Exception as e:
-            logger.error(f"Error in bulk host operation: {str(e)}")
+            logger.error("Error in bulk host operation: %s", e)
             return jsonify({"Error": str(e)}), 400
     
+    # Per-method handlers for individual objects
+    def get_object(ref):
+        """Read an object"""
+        obj = find_object_by_ref(ref)
+        if not obj:
+            logger.warning("Object not found: %s", ref)
+            return jsonify({"Error": "Object not found"}), 404
+        
+        logger.info("GET object: %s", ref)
+        return jsonify(obj)
+    
+    def put_object(ref):
+        """Update an object"""
+        obj = find_object_by_ref(ref)
+        if not obj:
+            logger.warning("Object not found for update: %s", ref)
+            return jsonify({"Error": "Object not found"}), 404
+        
+        data = request.json
+        
+        # Update the object
+        ref = update_object(ref, data)
+        logger.info("Updated object: %s", ref)
+        return jsonify(ref)
+    
+    def delete_object_by_ref(ref):
+        """Delete an object"""
+        obj = find_object_by_ref(ref)
+        if not obj:
+            logger.warning("Object not found for deletion: %s", ref)
+            return jsonify({"Error": "Object not found"}), 404
+        
+        # Delete the object
+        ref = delete_object(ref)
+        logger.info("Deleted object: %s", ref)
+        return jsonify(ref)
+    
+    object_handlers = {
+        'GET': get_object,
+        'PUT': put_object,
+        'DELETE': delete_object_by_ref
+    }
+    
     # Handler for individual objects (GET, PUT, DELETE)
-    @app.route(f'/wapi/{CONFIG["wapi_version"]}/<path:ref>', methods=['GET', 'PUT', 'DELETE'])
+    @app.route(f'{prefix}/<path:ref>', methods=['GET', 'PUT', 'DELETE'])
     @api_route
     def handle_object(ref):
         """Handle individual object: get, update, or delete"""
-        # Extract object type from reference
-        obj_type = ref.split('/')[0]
+        return object_handlers[request.method](ref)
+    
+    # Per-method handlers for object collections
+    def search_objects(obj_type):
+        """Search a collection"""
+        results = find_objects_by_query(obj_type, request.args)
         
-        # Handle GET (read)
-        if request.method == 'GET':
-            obj = find_object_by_ref(ref)
-            if not obj:
-                logger.warning(f"Object not found: {ref}")
-                return jsonify({"Error": "Object not found"}), 404
-            
-            logger.info(f"GET object: {ref}")
-            return jsonify(obj)
+        logger.info("GET %s: Found %s objects matching query", obj_type, len(results))
+        return jsonify(results)
+    
+    def create_object(obj_type):
+        """Create an object in a collection"""
+        data = request.get_json(silent=True)
+        if data is None:
+            return jsonify({"Error": "Invalid JSON body"}), 400
+        if not isinstance(data, dict):
+            return jsonify({"Error": "Invalid JSON body, expected an object"}), 400
+        
+        # Validate and prepare data
+        validated_data, error = validate_and_prepare_data(obj_type, data)
+        if error:
+            logger.warning("Validation error for %s: %s", obj_type, error)
+            return jsonify({"Error": error}), 400
         
-        # Handle PUT (update)
-        elif request.method == 'PUT':
-            obj = find_object_by_ref(ref)
-            if not obj:
-                logger.warning(f"Object not found for update: {ref}")
-                return jsonify({"Error": "Object not found"}), 404
-            
-            data = request.json
+        # Create the object reference
+        validated_data["_ref"] = generate_ref(obj_type, validated_data)
+        
+        # Check for duplicate (exact match on key fields)
+        if find_duplicate_object(obj_type, validated_data) is not None:
+            if obj_type == "network" or obj_type == "network_container":
+                logger.warning("Duplicate network: %s", validated_data.get('network'))
+                return jsonify({"Error": f"Network already exists: {validated_data.get('network')}"}), 400
             
-            # Update the object
-            ref = update_object(ref, data)
-            logger.info(f"Updated object: {ref}")
-            return jsonify(ref)
+            logger.warning("Duplicate DNS record: %s", validated_data.get('name'))
+            return jsonify({"Error": f"DNS record already exists: {validated_data.get('name')}"}), 400
         
-        # Handle DELETE
-        elif request.method == 'DELETE':
-            obj = find_object_by_ref(ref)
-            if not obj:
-                logger.warning(f"Object not found for deletion: {ref}")
-                return jsonify({"Error": "Object not found"}), 404
-            
-            # Delete the object
-            ref = delete_object(ref)
-            logger.info(f"Deleted object: {ref}")
-            return jsonify(ref)
+        # Save to database; a rejecting pre-create hook yields no reference
+        ref = add_object(obj_type, validated_data)
+        if ref is None:
+            return jsonify({"Error": f"Failed to create {obj_type}"}), 400
         
+        logger.info("Created new %s: %s", obj_type, ref)
+        
+        # Return reference as per Infoblox API
+        return jsonify(ref)
+    
+    collection_handlers = {
+        'GET': search_objects,
+        'POST': create_object
+    }
+    
     # Handler for object collections (GET, POST)
-    @app.route(f'/wapi/{CONFIG["wapi_version"]}/<obj_type>', methods=['GET', 'POST'])
+    @app.route(f'{prefix}/<obj_type>', methods=['GET', 'POST'])
     @api_route
     def handle_objects(obj_type):
         """Handle object collections: search or create"""
-        # Handle GET (search)
-        if request.method == 'GET':
-            query_params = request.args.to_dict()
-            results = find_objects_by_query(obj_type, query_params)
-            
-            logger.info(f"GET {obj_type}: Found {len(results)} objects matching query")
-            return jsonify(results)
-        
-        # Handle POST (create)
-        elif request.method == 'POST':
-            try:
-                data = request.json
-                
-                # Validate and prepare data
-                validated_data, error = validate_and_prepare_data(obj_type, data)
-                if error:
-                    logger.warning(f"Validation error for {obj_type}: {error}")
-                    return jsonify({"Error": error}), 400
-                
-                # Create the object reference
-                validated_data["_ref"] = generate_ref(obj_type, validated_data)
-                
-                # Check for duplicate (exact match on key fields)
-                if obj_type == "network" or obj_type == "network_container":
-                    # Check for duplicate network
-                    for existing in db[obj_type]:
-                        if existing.get("network") == validated_data.get("network") and \
-                           existing.get("network_view") == validated_data.get("network_view"):
-                            logger.warning(f"Duplicate network: {validated_data.get('network')}")
-                            return jsonify({"Error": f"Network already exists: {validated_data.get('network')}"}), 400
-                
-                elif obj_type.startswith("record:"):
-                    # Check for duplicate DNS record
-                    for existing in db[obj_type]:
-                        if existing.get("name") == validated_data.get("name") and \
-                           existing.get("view") == validated_data.get("view"):
-                            logger.warning(f"Duplicate DNS record: {validated_data.get('name')}")
-                            return jsonify({"Error": f"DNS record already exists: {validated_data.get('name')}"}), 400
-                
-                # Save to database
-                ref = add_object(obj_type, validated_data)
-                logger.info(f"Created new {obj_type}: {ref}")
-                
-                # Return reference as per Infoblox API
-                return jsonify(ref)
-            
-            except Exception as e:
-                logger.error(f"Error creating {obj_type}: {str(e)}")
-                return jsonify({"Error": str(e)}), 400
+        return collection_handlers[request.method](obj_type)
 
-    @app.route(f'/wapi/{CONFIG["wapi_version"]}/bulk', methods=['POST'])
+    @app.route(f'{prefix}/bulk', methods=['POST'])
     @api_route
     def bulk_operation():
         """Handle generic bulk operations"""
         if not is_feature_supported('bulk_operations'):
             return jsonify({"Error": "Function not available in this WAPI version"}), 400
         
-        try:
-            data = request.json
-            
-            # Validate request
-            if not isinstance(data, dict) or 'objects' not in data:
-                return jsonify({"Error": "Invalid request format, 'objects' field required"}), 400
-            
-            objects = data['objects']
-            if not isinstance(objects, list):
-                return jsonify({"Error": "'objects' must be a list"}), 400
-            
-            # Get operation type
-            operation = data.get('operation', 'create').lower()
-            if operation not in ['create', 'update', 'delete']:
-                return jsonify({"Error": f"Unsupported operation: {operation}"}), 400
-            
-            # Process the bulk operation
-            results = process_bulk_operation(objects, operation)
-            
-            return jsonify(results)
+        data = request.get_json(silent=True)
+        if data is None:
+            return jsonify({"Error": "Invalid JSON body"}), 400
         
-        except Exception as e:
-            logger.error(f"Error in bulk operation: {str(e)}")
-            return jsonify({"Error": str(e)}), 400
\ No newline at end of file
+        # Validate request
+        if not isinstance(data, dict) or 'objects' not in data:
+            return jsonify({"Error": "Invalid request format, 'objects' field required"}), 400
+        
+        objects = data['objects']
+        if not isinstance(objects, list):
+            return jsonify({"Error": "'objects' must be a list"}), 400
+        
+        # Get operation type
+        operation = data.get('operation', 'create')
+        if not isinstance(operation, str):
+            return jsonify({"Error": "'operation' must be a string"}), 400
+        operation = operation.lower()
+        if operation not in ['create', 'update', 'delete']:
+            return jsonify({"Error": f"Unsupported operation: {operation}"}), 400
+        
+        # Process the bulk operation
+        results = process_bulk_operation(objects, operation)
+        
+        return jsonify(results)
\ No newline at end of file
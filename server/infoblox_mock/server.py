@@ -10,6 +10,7 @@ import uuid
 from infoblox_mock.config import load_config, CONFIG
 from infoblox_mock.db import initialize_db, load_db_from_file
 from infoblox_mock import routes
+from infoblox_mock.json_provider import install_json_provider
 from infoblox_mock.mock_responses import load_mock_responses, record_interaction
 from infoblox_mock.statistics import api_stats
 
@@ -18,6 +19,7 @@ logger = logging.getLogger(__name__)
 def create_app(config_file=None):
     """Create and configure the Flask application"""
     app = Flask(__name__)
+    install_json_provider(app)
 
     # Add statistics tracking
     @app.before_request
@@ -2,53 +2,68 @@
 Utility functions for Infoblox Mock Server
 """
 
+import os
 import uuid
 import ipaddress
 import logging
 
 logger = logging.getLogger(__name__)
 
-def generate_ref(obj_type, obj_data):
+def generate_ref(obj_type, obj_data, random_bytes=None):
     """Create a reference ID similar to what Infoblox generates"""
     if obj_type == "network" or obj_type == "network_container":
         network = obj_data.get("network")
-        encoded = str(uuid.uuid4()).replace("-", "")[:24]
         return f"{obj_type}/ZG5zLm5ldHdvcmskMTAuMTAuMTAuMC8yNA:{network}"
     
     elif obj_type == "range":
         start = obj_data.get("start_addr")
         end = obj_data.get("end_addr")
-        encoded = str(uuid.uuid4()).replace("-", "")[:24]
         return f"{obj_type}/ZG5zLm5ldHdvcmskMTAuMTAuMTAuMC8yNA:{start}-{end}"
     
     elif obj_type.startswith("record:"):
         name = obj_data.get("name")
-        encoded = str(uuid.uuid4()).replace("-", "")[:24]
         return f"{obj_type}/ZG5zLm5ldHdvcmskMTAuMTAuMTAuMC8yNA:{name}"
     
     elif obj_type == "lease" or obj_type == "fixedaddress":
         ip = obj_data.get("ipv4addr") or obj_data.get("ip_address")
-        encoded = str(uuid.uuid4()).replace("-", "")[:24]
         return f"{obj_type}/ZG5zLm5ldHdvcmskMTAuMTAuMTAuMC8yNA:{ip}"
     
     else:
-        return f"{obj_type}/{str(uuid.uuid4())}"
+        # Same layout as uuid4(); bulk callers pass in pre-drawn random bytes
+        return f"{obj_type}/{uuid.UUID(bytes=random_bytes or os.urandom(16), version=4)}"
+
+def generate_refs(items):
+    """Create references for a list of (obj_type, obj_data) pairs with a single urandom call"""
+    raw = os.urandom(16 * len(items))
+    return [generate_ref(obj_type, obj_data, raw[i * 16:(i + 1) * 16])
+            for i, (obj_type, obj_data) in enumerate(items)]
+
+# Last octets never handed out: x.x.x.0, the x.x.x.1 gateway, and x.x.x.255
+_RESERVED_LAST_OCTETS = frozenset([0, 1, 255])
 
 def find_next_available_ip(network_cidr, used_ips):
-    """Find the next available IP in a network"""
+    """Find the next available IP in a network (used_ips holds integer addresses)"""
     try:
         net = ipaddress.ip_network(network_cidr, strict=False)
         
-        # Find next available IP
-        for ip in net.hosts():
-            ip_str = str(ip)
-            if ip_str not in used_ips:
-                # Skip network address, broadcast address, and gateway
-                if ip == net.network_address or ip == net.broadcast_address or ip_str.endswith(".0") or ip_str.endswith(".1") or ip_str.endswith(".255"):
-                    continue
-                
-                logger.debug(f"Found next available IP in {network_cidr}: {ip_str}")
-                return ip_str
+        # Scan host addresses as integers; only the result is formatted
+        network_int = int(net.network_address)
+        broadcast_int = int(net.broadcast_address)
+        if net.num_addresses > 2:
+            first, last = network_int + 1, broadcast_int - 1
+        else:
+            first, last = network_int, broadcast_int
+        
+        for value in range(first, last + 1):
+            if value in used_ips:
+                continue
+            # Skip network address, broadcast address, and gateway
+            if value == network_int or value == broadcast_int or (value & 0xFF) in _RESERVED_LAST_OCTETS:
+                continue
+            
+            ip_str = str(ipaddress.IPv4Address(value))
+            logger.debug(f"Found next available IP in {network_cidr}: {ip_str}")
+            return ip_str
         
         # No available IPs
         logger.warning(f"No available IPs in network: {network_cidr}")
@@ -78,6 +93,16 @@ def get_used_ips_in_db(db):
     
     return used_ips
 
+def ipv4_strings_to_ints(ips):
+    """Convert IPv4 address strings to a set of integers, skipping invalid ones"""
+    values = set()
+    for ip in ips:
+        try:
+            values.add(int(ipaddress.IPv4Address(ip)))
+        except ValueError:
+            continue
+    return values
+
 def get_used_ipv6_in_db(db):
     """Get all used IPv6 addresses from the database"""
     used_ips = set()
@@ -6,10 +6,29 @@ import re
 import ipaddress
 import base64
 from datetime import datetime
+from functools import lru_cache, wraps
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Distinct values remembered per memoized format check
+_VALIDATION_CACHE_SIZE = 1024
+
+def _memoize_check(func):
+    """Memoize a single-argument format check, bypassing the cache for unhashable input"""
+    cached = lru_cache(maxsize=_VALIDATION_CACHE_SIZE, typed=True)(func)
+    
+    @wraps(func)
+    def wrapper(value):
+        try:
+            return cached(value)
+        except TypeError:
+            return func(value)
+    
+    wrapper.cache_clear = cached.cache_clear
+    return wrapper
+
+@_memoize_check
 def validate_network(network):
     """Validate network CIDR format"""
     try:
@@ -18,6 +37,7 @@ def validate_network(network):
     except ValueError:
         return False
 
+@_memoize_check
 def validate_ipv4(ip):
     """Validate IPv4 address format"""
     try:
@@ -26,6 +46,7 @@ def validate_ipv4(ip):
     except ValueError:
         return False
 
+@_memoize_check
 def validate_ipv6(ip):
     """Validate IPv6 address format"""
     try:
@@ -34,6 +55,7 @@ def validate_ipv6(ip):
     except ValueError:
         return False
 
+@_memoize_check
 def validate_ip(ip):
     """Validate IP address format (either IPv4 or IPv6)"""
     try:
@@ -42,17 +64,22 @@ def validate_ip(ip):
     except ValueError:
         return False
 
+@_memoize_check
 def validate_hostname(hostname):
     """Validate hostname format"""
-    if not hostname:
+    if not hostname or not isinstance(hostname, str):
         return False
     
     # Simple hostname validation
     pattern = r'^(([a-zA-Z0-9]|[a-zA-Z0-9][a-zA-Z0-9\-]*[a-zA-Z0-9])\.)*([A-Za-z0-9]|[A-Za-z0-9][A-Za-z0-9\-]*[A-Za-z0-9])$'
     return bool(re.match(pattern, hostname))
 
+@_memoize_check
 def validate_mac_address(mac):
     """Validate MAC address format"""
+    if not isinstance(mac, str):
+        return False
+    
     # Pattern matches: 00:11:22:33:44:55, 00-11-22-33-44-55, or 001122334455
     pattern = r'^([0-9A-Fa-f]{2}[:-]){5}([0-9A-Fa-f]{2})$|^([0-9A-Fa-f]{12})$'
     return bool(re.match(pattern, mac))
@@ -293,6 +320,7 @@ def validate_and_prepare_ipv6_data(obj_type, data):
     
     return validated_data, None
 
+@_memoize_check
 def validate_ipv6_network(network):
     """Validate IPv6 network CIDR format"""
     try:
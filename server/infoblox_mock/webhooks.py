@@ -4,99 +4,236 @@ Webhook notifications for Infoblox Mock Server
 
 import logging
 import json
+import queue
+import sys
 import threading
+import time
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from infoblox_mock.config import CONFIG
+from infoblox_mock.json_provider import dumps_bytes
 
 logger = logging.getLogger(__name__)
 
+def _send_headers(headers):
+    """Final request headers for a webhook; registered headers override the defaults"""
+    return {'Content-Type': 'application/json', **(headers or {})}
+
+def _public_webhook(webhook):
+    """Webhook entry without internal (underscore) fields"""
+    return {k: v for k, v in webhook.items() if not k.startswith('_')}
+
+# Event types emitted by the server. Interned, like registered event types, so the
+# webhooks dict lookup in notify_webhook matches keys by identity.
+EVENT_OBJECT_CREATE = sys.intern('object:create')
+EVENT_OBJECT_UPDATE = sys.intern('object:update')
+EVENT_OBJECT_DELETE = sys.intern('object:delete')
+EVENT_GRID_RESTORE = sys.intern('grid:restore')
+
+# Keep-alive connection pool shared by all webhook deliveries
+WEBHOOK_POOL_CONNECTIONS = 32  # Number of receiver hosts to keep pools for
+WEBHOOK_POOL_MAXSIZE = 64      # Connections kept per receiver host
+WEBHOOK_RETRIES = 3            # Connection-level retries; POSTs are never re-sent after a response
+MAX_WEBHOOKS_PER_EVENT = 256   # Least recently registered webhooks are dropped beyond this
+
+# Coalescing for webhooks registered with batch=True
+WEBHOOK_FLUSH_INTERVAL = 0.05  # Seconds to collect events after the first one arrives
+WEBHOOK_MAX_BATCH = 100        # Events per batched delivery at most
+
 class WebhookManager:
     """Manager for webhook notifications"""
     
     def __init__(self):
         """Initialize the webhook manager"""
-        self.webhooks = {}
-    
-    def register_webhook(self, event_type, url, headers=None):
-        """Register a webhook for an event type"""
-        if event_type not in self.webhooks:
-            self.webhooks[event_type] = []
+        self.webhooks = {}  # event_type -> {url: webhook}
+        self._lock = threading.RLock()  # Guards self.webhooks; never held during delivery
         
-        # Add webhook if it doesn't already exist
-        webhook = {
-            'url': url,
-            'headers': headers or {},
-            'created': datetime.now().isoformat()
-        }
+        # One session so repeated posts to a receiver reuse its keep-alive connections
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=WEBHOOK_POOL_CONNECTIONS,
+            pool_maxsize=WEBHOOK_POOL_MAXSIZE,
+            max_retries=Retry(total=WEBHOOK_RETRIES, backoff_factor=0.1)
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        
+        # Bounded worker pool, sized from CONFIG['webhook_workers'] on first use;
+        # deliveries queue up instead of spawning a thread each
+        self._executor = None
+        
+        # Encoded events waiting for batching webhooks; drained by a thread started on first use
+        self._batch_queue = queue.Queue()
+        self._batch_thread = None
+    
+    def register_webhook(self, event_type, url, headers=None, batch=False):
+        """Register a webhook for an event type (batch webhooks get {"events": [...]} groups)"""
+        if isinstance(event_type, str):
+            event_type = sys.intern(event_type)
         
-        for existing in self.webhooks[event_type]:
-            if existing['url'] == url:
-                # Update headers if webhook already exists
+        with self._lock:
+            webhooks = self.webhooks.setdefault(event_type, {})
+            
+            existing = webhooks.pop(url, None)
+            if existing is not None:
+                # Update headers and delivery mode if webhook already exists,
+                # re-inserting it as the most recently registered
+                webhooks[url] = existing
                 existing['headers'] = headers or {}
+                existing['batch'] = bool(batch)
+                existing['_send_headers'] = _send_headers(headers)
                 return True
+            
+            # Add new webhook
+            webhooks[url] = {
+                'url': url,
+                'headers': headers or {},
+                'batch': bool(batch),
+                'created': datetime.now().isoformat(),
+                '_send_headers': _send_headers(headers)
+            }
+            
+            # Bound each event type's subscribers; dicts keep registration order
+            evicted = []
+            while len(webhooks) > MAX_WEBHOOKS_PER_EVENT:
+                evicted.append(webhooks.pop(next(iter(webhooks)))['url'])
         
-        # Add new webhook
-        self.webhooks[event_type].append(webhook)
-        logger.info(f"Registered webhook for {event_type}: {url}")
+        for evicted_url in evicted:
+            logger.warning("Evicted webhook for %s: %s (limit %s reached)",
+                           event_type, evicted_url, MAX_WEBHOOKS_PER_EVENT)
+        logger.info("Registered webhook for %s: %s", event_type, url)
         return True
     
     def unregister_webhook(self, event_type, url):
         """Unregister a webhook"""
-        if event_type not in self.webhooks:
-            return False
-        
         # Remove webhook if it exists
-        initial_count = len(self.webhooks[event_type])
-        self.webhooks[event_type] = [w for w in self.webhooks[event_type] if w['url'] != url]
+        with self._lock:
+            removed = self.webhooks.get(event_type, {}).pop(url, None)
         
-        # Check if any were removed
-        if len(self.webhooks[event_type]) < initial_count:
-            logger.info(f"Unregistered webhook for {event_type}: {url}")
+        if removed is not None:
+            logger.info("Unregistered webhook for %s: %s", event_type, url)
             return True
         
         return False
     
     def notify_webhook(self, event_type, data):
         """Send a webhook notification for an event"""
-        if event_type not in self.webhooks:
-            return
+        # Snapshot the subscribers so registrations can change while we deliver;
+        # with none left (never registered, or all unregistered) nothing is built
+        with self._lock:
+            webhooks = self.webhooks.get(event_type)
+            if not webhooks:
+                return
+            targets = [webhook for webhook in webhooks.values() if not webhook['batch']]
+            batched = len(targets) < len(webhooks)
         
-        # Add timestamp to data
+        # Add timestamp to data; the payload may hold live db objects, so copy
+        # them before the caller's lock is released and encode on the pool
         enriched_data = {
             'event_type': event_type,
             'timestamp': datetime.now().isoformat(),
-            'data': data
+            'data': {key: value.copy() if isinstance(value, dict) else value
+                     for key, value in data.items()}
         }
+        self._get_executor().submit(self._dispatch, event_type, enriched_data, targets, batched)
+    
+    def _dispatch(self, event_type, enriched_data, targets, batched):
+        """Encode an event and hand it to its subscribers (runs on the worker pool)"""
+        # Encode once; every subscriber is sent the same bytes
+        try:
+            body = dumps_bytes(enriched_data)
+        except (TypeError, ValueError) as e:
+            logger.error("Error encoding %s webhook notification: %s", event_type, e)
+            return
         
-        # Send notifications asynchronously
-        def send_notification(webhook, payload):
-            try:
-                response = requests.post(
-                    webhook['url'],
-                    json=payload,
-                    headers=webhook['headers'],
-                    timeout=5
-                )
-                logger.info(f"Webhook notification sent to {webhook['url']}, status: {response.status_code}")
-            except Exception as e:
-                logger.error(f"Error sending webhook notification to {webhook['url']}: {str(e)}")
+        # Send to all registered webhooks for this event type asynchronously
+        for webhook in targets:
+            self._get_executor().submit(self._send_notification, webhook, body)
         
-        # Send to all registered webhooks for this event type
-        for webhook in self.webhooks[event_type]:
-            thread = threading.Thread(
-                target=send_notification,
-                args=(webhook, enriched_data)
+        # Batching webhooks receive the event with others from the same burst
+        if batched:
+            self._start_batch_thread()
+            self._batch_queue.put((event_type, body))
+    
+    def _get_executor(self):
+        """Create the delivery worker pool on first use, after config has been loaded"""
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=CONFIG.get('webhook_workers', 8),
+                        thread_name_prefix='webhook'
+                    )
+        return self._executor
+    
+    def _start_batch_thread(self):
+        """Start the batch drain thread on first use"""
+        if self._batch_thread is None:
+            with self._lock:
+                if self._batch_thread is None:
+                    self._batch_thread = threading.Thread(
+                        target=self._drain_batches,
+                        name='webhook-batch',
+                        daemon=True
+                    )
+                    self._batch_thread.start()
+    
+    def _drain_batches(self):
+        """Group queued events per event type and deliver each group once (runs forever)"""
+        while True:
+            batch = [self._batch_queue.get()]
+            deadline = time.monotonic() + WEBHOOK_FLUSH_INTERVAL
+            while len(batch) < WEBHOOK_MAX_BATCH:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._batch_queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            events_by_type = {}
+            for event_type, body in batch:
+                events_by_type.setdefault(event_type, []).append(body)
+            
+            for event_type, bodies in events_by_type.items():
+                with self._lock:
+                    targets = [webhook for webhook in self.webhooks.get(event_type, {}).values()
+                               if webhook['batch']]
+                if not targets:
+                    continue
+                
+                # Events are already encoded; splice them into one array payload
+                body = b'{"events":[' + b','.join(bodies) + b']}'
+                for webhook in targets:
+                    self._get_executor().submit(self._send_notification, webhook, body)
+    
+    def _send_notification(self, webhook, body):
+        """Deliver one encoded notification to a webhook (runs on the worker pool)"""
+        try:
+            response = self.session.post(
+                webhook['url'],
+                data=body,
+                headers=webhook['_send_headers'],
+                timeout=5
             )
-            thread.daemon = True
-            thread.start()
+            logger.info("Webhook notification sent to %s, status: %s", webhook['url'], response.status_code)
+        except Exception as e:
+            logger.error("Error sending webhook notification to %s: %s", webhook['url'], e)
     
     def get_webhooks(self, event_type=None):
         """Get all registered webhooks"""
-        if event_type:
-            return self.webhooks.get(event_type, [])
-        
-        # Return all webhooks grouped by event type
-        return self.webhooks
+        with self._lock:
+            if event_type:
+                return [_public_webhook(w) for w in self.webhooks.get(event_type, {}).values()]
+            
+            # Return all webhooks grouped by event type
+            return {event: [_public_webhook(w) for w in webhooks.values()]
+                    for event, webhooks in self.webhooks.items()}
 
 # Create a global instance
 webhook_manager = WebhookManager()
\ No newline at end of file
@@ -33,6 +33,7 @@ setup(
         'requests>=2.25.0',
         'ipaddress>=1.0.23',
         'python-dateutil>=2.8.2',
+        'orjson>=3.10; python_version >= "3.8"',
     ],
     entry_points={
         'console_scripts': [
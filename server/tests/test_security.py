@@ -0,0 +1,40 @@
+"""
+Tests for certificate handling in the security model
+"""
+
+from infoblox_mock.models import security
+
+
+def _cert(n):
+    return {
+        "pem": f"-----BEGIN CERTIFICATE-----\nMIIB{n:04d}\n-----END CERTIFICATE-----\n",
+        "subject": f"CN=user{n}",
+        "issuer": "CN=Mock CA"
+    }
+
+
+def test_add_certificates_bulk_stores_and_validates():
+    cert_list = [(f"user{n}", _cert(n)) for n in range(100)]
+
+    hashes = security.add_certificates_bulk(cert_list)
+
+    assert len(hashes) == len(set(hashes)) == 100
+    for (username, cert_data), cert_hash in zip(cert_list, hashes):
+        record = security.certificates[cert_hash]
+        assert record["username"] == username
+        assert record["subject"] == cert_data["subject"]
+        assert record["issuer"] == "CN=Mock CA"
+        assert security.validate_certificate(cert_data) == username
+
+    for cert_hash in hashes:
+        assert security.remove_certificate(cert_hash)
+
+
+def test_add_certificates_bulk_matches_add_certificate():
+    cert_data = _cert(7)
+
+    single = security.add_certificate("alice", cert_data)
+    (bulk,) = security.add_certificates_bulk([("alice", cert_data)])
+
+    assert single == bulk
+    security.remove_certificate(single)